@@ -0,0 +1,180 @@
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from db import DB_PATH, DB_TIMEOUT, connect, data_version, numeric_value
+from snapshot import DataUnavailable
+
+# After a failed reload, keep serving the previous summary this long before trying again
+RELOAD_RETRY_SECONDS = 5
+
+_cache = {"version": None, "summary": None, "retry_at": 0.0}
+_cache_lock = threading.Lock()
+
+
+def _as_float(value):
+    """A stored stat value ("821", "0.78", "78%") as a float, or NaN"""
+    number = numeric_value(value)
+    return np.nan if number is None else number
+
+
+def _is_count(value):
+    """Whole numbers like "821" are counts; rates ("0.78") and percentages ("78%") are not"""
+    return re.fullmatch(r'\d+', str(value or '').replace(',', '').strip()) is not None
+
+
+def load_stat_table(db_path=DB_PATH):
+    """Load the categories and stats tables into columnar numpy arrays"""
+    conn = connect(db_path, readonly=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name, display_name FROM categories ORDER BY id")
+        categories = cursor.fetchall()
+        cursor.execute("SELECT id, category_id, description, messi_value, ronaldo_value FROM stats ORDER BY id")
+        stats = cursor.fetchall()
+    finally:
+        conn.close()
+
+    category_index = {row[0]: i for i, row in enumerate(categories)}
+    # Stats pointing at a missing category are dropped rather than failing the whole load
+    stats = [row for row in stats if row[1] in category_index]
+
+    return {
+        "category_ids": np.array([row[0] for row in categories], dtype=np.int64),
+        "category_names": [row[1] for row in categories],
+        "category_display": [row[2] for row in categories],
+        "stat_ids": np.array([row[0] for row in stats], dtype=np.int64),
+        "stat_category": np.array([category_index[row[1]] for row in stats], dtype=np.int64),
+        "descriptions": np.array([row[2] or "" for row in stats], dtype=object),
+        "messi": np.array([_as_float(row[3]) for row in stats], dtype=np.float64),
+        "ronaldo": np.array([_as_float(row[4]) for row in stats], dtype=np.float64),
+        "counting": np.array([_is_count(row[3]) and _is_count(row[4]) for row in stats], dtype=bool),
+    }
+
+
+def _safe_divide(numerator, denominator):
+    """Element-wise division that yields NaN instead of inf/warnings on zero"""
+    out = np.full(np.broadcast(numerator, denominator).shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+
+def _to_json_list(values):
+    """Round floats and turn NaN into None so the result is valid JSON"""
+    return [None if np.isnan(v) else round(float(v), 4) for v in values]
+
+
+def _games_played(table):
+    """Row of the Games Played stat, the denominator for per-game rates, or None"""
+    descriptions = table["descriptions"]
+    matches = np.flatnonzero(np.char.lower(descriptions.astype(str)) == "games played")
+    return int(matches[0]) if matches.size else None
+
+
+def compute_summary(table):
+    """Compute whole-column aggregates over the stat table"""
+    messi = table["messi"]
+    ronaldo = table["ronaldo"]
+    stat_category = table["stat_category"]
+    n_categories = len(table["category_names"])
+
+    comparable = ~(np.isnan(messi) | np.isnan(ronaldo))
+    messi_leads = comparable & (messi > ronaldo)
+    ronaldo_leads = comparable & (ronaldo > messi)
+    ties = comparable & (messi == ronaldo)
+
+    def per_category(mask):
+        return np.bincount(stat_category, weights=mask.astype(np.float64), minlength=n_categories)
+
+    messi_lead_counts = per_category(messi_leads)
+    ronaldo_lead_counts = per_category(ronaldo_leads)
+    tie_counts = per_category(ties)
+    stat_counts = np.bincount(stat_category, minlength=n_categories)
+
+    # Per-game rates only make sense for counts; rates, percentages and Games Played itself get none
+    games = _games_played(table)
+    per_game = np.zeros(messi.size, dtype=bool)
+    messi_games = ronaldo_games = np.nan
+    if games is not None:
+        per_game = table["counting"].copy()
+        per_game[games] = False
+        messi_games, ronaldo_games = messi[games], ronaldo[games]
+    ratios = _safe_divide(messi, ronaldo)
+    percent_diff = _safe_divide(messi - ronaldo, ronaldo) * 100
+
+    categories = []
+    for i, name in enumerate(table["category_names"]):
+        categories.append({
+            "name": name,
+            "display_name": table["category_display"][i],
+            "stat_count": int(stat_counts[i]),
+            "messi_leads": int(messi_lead_counts[i]),
+            "ronaldo_leads": int(ronaldo_lead_counts[i]),
+            "ties": int(tie_counts[i]),
+        })
+
+    stats = {
+        "id": table["stat_ids"].tolist(),
+        "category": [table["category_names"][i] for i in stat_category],
+        "description": table["descriptions"].tolist(),
+        "messi": _to_json_list(messi),
+        "ronaldo": _to_json_list(ronaldo),
+        "ratio": _to_json_list(ratios),
+        "percent_difference": _to_json_list(percent_diff),
+        "messi_per_game": _to_json_list(np.where(per_game, _safe_divide(messi, messi_games), np.nan)),
+        "ronaldo_per_game": _to_json_list(np.where(per_game, _safe_divide(ronaldo, ronaldo_games), np.nan)),
+    }
+
+    return {
+        "overall": {
+            "stat_count": int(messi.size),
+            "comparable": int(comparable.sum()),
+            "messi_leads": int(messi_leads.sum()),
+            "ronaldo_leads": int(ronaldo_leads.sum()),
+            "ties": int(ties.sum()),
+        },
+        "categories": categories,
+        "stats": stats,
+    }
+
+
+def get_summary(db_path=DB_PATH):
+    """Return the analytics summary, recomputing only when the data version changes.
+
+    While the database is missing or locked the last good summary keeps being served;
+    DataUnavailable is raised only when there has never been one.
+    """
+    version = data_version(db_path)
+    summary = _cache["summary"]
+    if summary is not None:
+        if _cache["version"] == version or version is None or time.monotonic() < _cache["retry_at"]:
+            return summary
+        # Another request is already recomputing; answer from the previous summary meanwhile
+        if not _cache_lock.acquire(blocking=False):
+            return summary
+    elif not _cache_lock.acquire(timeout=DB_TIMEOUT):
+        raise DataUnavailable("Timed out waiting for the analytics to load")
+
+    try:
+        summary = _cache["summary"]
+        if summary is not None and _cache["version"] == version:
+            return summary
+        try:
+            table = load_stat_table(db_path)
+        except sqlite3.Error as e:
+            _cache["retry_at"] = time.monotonic() + RELOAD_RETRY_SECONDS
+            if summary is None:
+                raise DataUnavailable(f"Analytics are unavailable: {str(e)}") from e
+            print(f"Reload failed, serving the analytics from {_cache['version']}: {str(e)}")
+            return summary
+        summary = compute_summary(table)
+        summary["data_version"] = version
+
+        _cache["version"] = version
+        _cache["summary"] = summary
+        return summary
+    finally:
+        _cache_lock.release()
@@ -1,53 +1,200 @@
 from flask import Flask, request, jsonify, render_template
 import sqlite3
-import re
-from difflib import get_close_matches
 import os
+import time
+import threading
+from functools import wraps
+from context_store import SessionContext, create_context_store
+from ratelimit import TokenBucketLimiter, SingleFlight, ConcurrencyLimiter
+import profiling
+from question_log import create_question_log, loggable_context, normalize_question, session_key
+from distribution import create_distributor
 
 app = Flask(__name__)
+context_store = create_context_store()
+question_log = create_question_log()
+# Shares one data version across workers and hosts when SNAPSHOT_DIR is set
+distributor = create_distributor()
+
+# Per-client limits: /ask allows short bursts, the mutating endpoints a couple of calls a minute
+ask_limiter = TokenBucketLimiter(rate=5, capacity=20)
+write_limiter = TokenBucketLimiter(rate=1 / 30, capacity=2)
+
+# Only one refresh/initialize may rewrite the database at a time
+write_lock = threading.Lock()
+answer_flight = SingleFlight()
+
+# Requests beyond this many in progress are shed with 503 instead of queueing behind slow ones
+request_slots = ConcurrencyLimiter(int(os.environ.get('MAX_IN_FLIGHT', '32')))
+
+# Session ids are opaque client strings; anything else is rejected before it reaches the context store
+MAX_SESSION_ID_LENGTH = 128
+
+def rate_limited(limiter):
+    """Reject requests with 429 once the client's bucket for this endpoint is empty"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            allowed, retry_after = limiter.allow((request.remote_addr, request.endpoint))
+            if not allowed:
+                response = jsonify({"status": "error", "message": "Too many requests, please slow down"})
+                response.headers['Retry-After'] = str(max(1, round(retry_after)))
+                return response, 429
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def unavailable(message, retry_after=1):
+    response = jsonify({"status": "error", "message": message})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 503
+
+def shed_load(view):
+    """Answer 503 straight away when too many requests are already in progress"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not request_slots.acquire():
+            return unavailable("The server is busy, please try again shortly")
+        try:
+            return view(*args, **kwargs)
+        finally:
+            request_slots.release()
+    return wrapper
+
+def profiled(view):
+    """Profile sampled requests, and ones sending the profiling token, into the profile buffer"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        reason = profiling.should_profile(request.headers.get('X-Profile-Token'))
+        if not reason:
+            return view(*args, **kwargs)
+
+        session = profiling.start(request.endpoint, request.full_path, reason)
+        try:
+            response = app.make_response(view(*args, **kwargs))
+        finally:
+            record = profiling.finish(session)
+        if record:
+            response.headers['X-Profile-Id'] = str(record.id)
+        return response
+    return wrapper
+
+def profiling_admin(view):
+    """The profiling endpoints only exist when PROFILING_TOKEN is set, and require it in X-Profile-Token"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not profiling.authorized(request.headers.get('X-Profile-Token')):
+            return jsonify({"status": "error", "message": "Not found"}), 404
+        return view(*args, **kwargs)
+    return wrapper
+
+def exclusive_write(view):
+    """Serialize database rewrites; a second concurrent writer gets 409 instead of queueing"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not write_lock.acquire(blocking=False):
+            return jsonify({"status": "error", "message": "A data update is already in progress"}), 409
+        try:
+            return view(*args, **kwargs)
+        finally:
+            write_lock.release()
+    return wrapper
 
 def get_database_connection():
-    conn = sqlite3.connect('football_stats.db')
+    from db import connect
+    conn = connect()
     conn.row_factory = sqlite3.Row
     return conn
 
 def refresh_data():
+    # Only the refresh leader scrapes and publishes; followers wait for what it publishes
+    if distributor and not distributor.is_leader:
+        print("Skipping refresh: this process follows the snapshot refresh leader")
+        return False
     from scraper import scrape_messi_vs_ronaldo
-    return scrape_messi_vs_ronaldo()
+    success = scrape_messi_vs_ronaldo()
+    if success and distributor:
+        distributor.publish()
+    return success
+
+def refresh_for_followers():
+    """Run a refresh a follower asked for, unless one is already in progress"""
+    if not write_lock.acquire(blocking=False):
+        return
+    try:
+        refresh_data()
+    except Exception as e:
+        print(f"Error refreshing data for followers: {str(e)}")
+    finally:
+        write_lock.release()
+
+def warm_caches():
+    """Load a newly installed data version now rather than on the next question"""
+    from snapshot import get_snapshot
+    from players import get_player_index
+    get_snapshot()
+    get_player_index()
+
+CATEGORY_KEYWORDS = {
+    "goals": ["goal", "goals", "score", "scored", "scoring", "scorer"],
+    "assists": ["assist", "assists", "pass", "passes", "passing"],
+    "trophies": ["trophy", "trophies", "title", "titles", "cup", "cups", "champion", "championship", "win", "won"],
+    "awards": ["award", "awards", "ballon", "d'or", "golden", "boot", "player of the year"],
+    "international": ["international", "country", "national", "nation", "world cup", "euro", "copa"],
+    "club": ["club", "team", "barcelona", "real madrid", "manchester united", "juventus", "psg"],
+    "career": ["career", "overall", "total", "statistic", "statistics"],
+    "hat_tricks": ["hat trick", "hat-trick", "hattrick"],
+    "free_kicks": ["free kick", "free-kick", "freekick"],
+    "penalties": ["penalty", "penalties", "pen"],
+}
+
+COMPARISON_PATTERNS = [
+    r"who has (more|better|higher|greater|most|bigger)",
+    r"who scored (more|most)",
+    r"who won (more|most)",
+    r"compare",
+    r"comparison",
+    r"difference between",
+    r"vs",
+    r"versus",
+]
+
+# Every comparison_type extract_intent and answer_question can resolve to
+COMPARISON_TYPES = {"general", "comparison", "single_player", "messi_only", "ronaldo_only",
+                    "direct_question", "players"}
+
+def context_hint(hint):
+    """SessionContext from the intent the page sends along, or None unless it names a known intent"""
+    if not isinstance(hint, dict):
+        return None
+    category = hint.get('category')
+    comparison_type = hint.get('comparison_type', 'general')
+    if not (isinstance(category, str) and category in CATEGORY_KEYWORDS):
+        return None
+    if not (isinstance(comparison_type, str) and comparison_type in COMPARISON_TYPES):
+        return None
+    return SessionContext(category, None, comparison_type, time.time())
+
+def keyword_category(text):
+    """First category whose keyword appears in the lowercased question, or None"""
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        for keyword in keywords:
+            if keyword in text:
+                return category
+    return None
 
-def extract_intent(question):
+def extract_intent(question, context=None):
+    import re
     text = question.lower()
-    categories = {
-        "goals": ["goal", "goals", "score", "scored", "scoring", "scorer"],
-        "assists": ["assist", "assists", "pass", "passes", "passing"],
-        "trophies": ["trophy", "trophies", "title", "titles", "cup", "cups", "champion", "championship", "win", "won"],
-        "awards": ["award", "awards", "ballon", "d'or", "golden", "boot", "player of the year"],
-        "international": ["international", "country", "national", "nation", "world cup", "euro", "copa"],
-        "club": ["club", "team", "barcelona", "real madrid", "manchester united", "juventus", "psg"],
-        "career": ["career", "overall", "total", "statistic", "statistics"],
-        "hat_tricks": ["hat trick", "hat-trick", "hattrick"],
-        "free_kicks": ["free kick", "free-kick", "freekick"],
-        "penalties": ["penalty", "penalties", "pen"],
-    }
-
-    comparison_patterns = [
-        r"who has (more|better|higher|greater|most|bigger)",
-        r"who scored (more|most)",
-        r"who won (more|most)",
-        r"compare",
-        r"comparison",
-        r"difference between",
-        r"vs",
-        r"versus",
-    ]
-
     detected_category = None
     specific_stat = None
     comparison_type = "general"
 
-    # Determine if query is about a specific player
-    is_messi_specific = any(name in text for name in ["messi", "lionel"])
-    is_ronaldo_specific = any(name in text for name in ["ronaldo", "cristiano"])
+    # Determine if query is about a specific player, using the prebuilt alias lookup
+    from players import find_players
+    mentioned = {player.key for player in find_players(text)}
+    is_messi_specific = "messi" in mentioned
+    is_ronaldo_specific = "ronaldo" in mentioned
     
     # Check if it's a single player query
     if (is_messi_specific and not is_ronaldo_specific) or (is_ronaldo_specific and not is_messi_specific):
@@ -59,18 +206,18 @@ def extract_intent(question):
     
     # If it's still not a single player query, check for comparison indicators
     else:
-        for pattern in comparison_patterns:
+        for pattern in COMPARISON_PATTERNS:
             if re.search(pattern, text):
                 comparison_type = "comparison"
                 break
 
-    for category, keywords in categories.items():
-        for keyword in keywords:
-            if keyword in text:
-                detected_category = category
-                break
-        if detected_category:
-            break
+    # Nearest canonical question first; the keyword lists are only a fallback
+    from intent_index import match_intent
+    match = match_intent(text)
+    if match:
+        detected_category, specific_stat, _ = match
+    else:
+        detected_category = keyword_category(text)
     
     # Handle direct questions
     direct_questions = {
@@ -112,183 +259,239 @@ def extract_intent(question):
     elif "hat trick" in text or "hat-trick" in text or "hattrick" in text:
         detected_category = "hat_tricks"
 
-    return (detected_category, specific_stat, comparison_type)
+    # Follow-ups like "and assists?" or "what about Ronaldo?" fill missing slots from the last answer
+    own_intent = (detected_category, specific_stat, comparison_type)
+    if context:
+        if not detected_category:
+            detected_category = context.category
+            specific_stat = specific_stat or context.specific_stat
+        if comparison_type == "general" and context.comparison_type in ["messi_only", "ronaldo_only"]:
+            comparison_type = context.comparison_type
+
+    # The fourth value says whether any slot came from the context rather than the question itself
+    inherited = (detected_category, specific_stat, comparison_type) != own_intent
+    return (detected_category, specific_stat, comparison_type, inherited)
+
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+                "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10}
+
+def extract_top_k(question):
+    """Return N for questions like "top 5 free-kick scorers", otherwise None"""
+    import re
+    match = re.search(r"\b(?:top|best|leading)\s+(\d+|" + "|".join(NUMBER_WORDS) + r")\b", question.lower())
+    if not match:
+        return None
+    value = match.group(1)
+    return int(value) if value.isdigit() else NUMBER_WORDS[value]
+
+def get_players_answer(category, specific_stat, player_keys, top_k=None):
+    """Answer for any number of players, or a top-k ranking, from the long-format player_stats table"""
+    from players import get_player_index, category_stats, player_values, top_players
+
+    index = get_player_index()
+    # Rankings need a stat to rank by; goals is the natural default
+    category = category or ("goals" if top_k else None)
+    if not category:
+        return {
+            "answer": "Which statistic would you like me to compare for these players?",
+            "type": "clarification"
+        }
+
+    stats = category_stats(category, specific_stat, index)
+    category_display = index.category_display.get(category, category)
+    if not stats:
+        return {
+            "answer": f"I don't have specific statistics about {category_display} right now.",
+            "type": "not_found"
+        }
+
+    if top_k:
+        stat = stats[0]
+        ranking = top_players(stat.key, top_k, index=index)
+        result = f"Top {len(ranking)} for {stat.description}:\n\n"
+        for position, (player, value) in enumerate(ranking, start=1):
+            result += f"{position}. {player.name}: {value}\n"
+        return {
+            "answer": result.strip(),
+            "type": "top_players",
+            "category": category_display,
+            "data": [{"player": player.key, "name": player.name, "value": value} for player, value in ranking]
+        }
+
+    players = [index.by_key[key] for key in player_keys if key in index.by_key]
+    values = player_values([player.id for player in players], [stat.key for stat in stats], index=index)
+
+    # One player is a profile rather than a comparison, worded like the Messi/Ronaldo single-player answers
+    if len(players) == 1:
+        player = players[0]
+        result = f"{player.name}'s {category_display} Statistics:\n\n"
+        for stat in stats:
+            result += f"• {stat.description}: {values.get((player.id, stat.key), 'N/A')}\n"
+        return {
+            "answer": result.strip(),
+            "type": "single_player",
+            "player": player.key,
+            "category": category_display,
+            "data": [{"description": stat.description, "values": {player.key: values.get((player.id, stat.key))}}
+                     for stat in stats]
+        }
+
+    result = f"Comparing {category_display} between {', '.join(player.name for player in players)}:\n\n"
+    for stat in stats:
+        cells = " vs ".join(f"{player.name} ({values.get((player.id, stat.key), 'N/A')})" for player in players)
+        result += f"• {stat.description}: {cells}\n"
+
+    return {
+        "answer": result.strip(),
+        "type": "players_comparison",
+        "category": category_display,
+        "data": [
+            {"description": stat.description,
+             "values": {player.key: values.get((player.id, stat.key)) for player in players}}
+            for stat in stats
+        ]
+    }
 
 def get_answer(category, specific_stat=None, comparison_type="general"):
-    conn = get_database_connection()
-    cursor = conn.cursor()
+    from snapshot import get_snapshot
 
-    try:
-        if not category:
-            return {
-                "answer": "I can provide information about Messi and Ronaldo on goals, assists, trophies, awards, and more. What would you like to know?",
-                "type": "clarification"
-            }
+    if not category:
+        return {
+            "answer": "I can provide information about Messi and Ronaldo on goals, assists, trophies, awards, and more. What would you like to know?",
+            "type": "clarification"
+        }
 
-        # Fetch all categories
-        cursor.execute("SELECT name, id, display_name FROM categories")
-        all_categories = cursor.fetchall()
-        
-        # Debug logging
-        print(f"Looking for category: {category}")
-        print(f"Available categories: {[row['name'] for row in all_categories]}")
-        print(f"Comparison type: {comparison_type}")
+    # Categories and stats come from the in-memory snapshot, rebuilt only when the data changes
+    snapshot = get_snapshot()
+    all_categories = snapshot.categories
+    
+    # Direct match first
+    category_result = snapshot.by_name.get(category.lower())
+    
+    # If no direct match, try fuzzy match with more flexibility
+    if not category_result and all_categories:
+        from difflib import get_close_matches
+        matches = get_close_matches(category.lower(), list(snapshot.by_name), n=3, cutoff=0.3)
         
-        # Direct match first
-        category_result = None
+        if matches:
+            category_result = snapshot.by_name[matches[0]]
+    
+    # Still no match, try keyword matching
+    if not category_result:
         for row in all_categories:
-            if row['name'].lower() == category.lower():
+            if category.lower() in row.name.lower() or row.name.lower() in category.lower():
                 category_result = row
                 break
-        
-        # If no direct match, try fuzzy match with more flexibility
-        if not category_result and all_categories:
-            category_names = [row['name'] for row in all_categories]
-            matches = get_close_matches(category.lower(), category_names, n=3, cutoff=0.3)
-            
-            if matches:
-                matched_name = matches[0]
-                for row in all_categories:
-                    if row['name'] == matched_name:
-                        category_result = row
-                        break
-        
-        # Still no match, try keyword matching
-        if not category_result:
-            for row in all_categories:
-                if category.lower() in row['name'].lower() or row['name'].lower() in category.lower():
+    
+    # If still no match, check if any keyword from the database categories is in the user's query
+    if not category_result:
+        for row in all_categories:
+            db_category_keywords = row.name.lower().split('_')
+            for keyword in db_category_keywords:
+                if keyword in category.lower() and len(keyword) > 2:  # Avoid short words
                     category_result = row
                     break
-        
-        # If still no match, check if any keyword from the database categories is in the user's query
-        if not category_result:
-            for row in all_categories:
-                db_category_keywords = row['name'].lower().split('_')
-                for keyword in db_category_keywords:
-                    if keyword in category.lower() and len(keyword) > 2:  # Avoid short words
-                        category_result = row
-                        break
-                if category_result:
-                    break
-
-        if not category_result:
-            return {
-                "answer": f"I don't have information about {category}. I can provide details about goals, assists, trophies, and other statistics.",
-                "type": "not_found"
-            }
-
-        category_id = category_result['id']
-        category_display = category_result['display_name']
-
-        # Get all stats under the matched category
-        cursor.execute("SELECT * FROM stats WHERE category_id = ?", (category_id,))
-        stats = cursor.fetchall()
+            if category_result:
+                break
 
-        if not stats:
-            return {
-                "answer": f"I don't have specific statistics about {category_display} right now.",
-                "type": "not_found"
-            }
+    if not category_result:
+        return {
+            "answer": f"I don't have information about {category}. I can provide details about goals, assists, trophies, and other statistics.",
+            "type": "not_found"
+        }
 
-        # Handle direct questions about specific stats
-        if comparison_type == "direct_question" and specific_stat:
-            matched_stat = None
-            for stat in stats:
-                if specific_stat.lower() in stat['description'].lower():
-                    matched_stat = stat
-                    break
+    category_display = category_result.display_name
+    stats = category_result.stats
 
-            if matched_stat:
-                messi_value = matched_stat['messi_value']
-                ronaldo_value = matched_stat['ronaldo_value']
-                description = matched_stat['description']
-
-                if "world cup" in specific_stat.lower():
-                    return {
-                        "answer": f"Lionel Messi has won the World Cup (2022 with Argentina). Cristiano Ronaldo has not won a World Cup.",
-                        "type": "direct_answer"
-                    }
-                elif "champions league" in specific_stat.lower():
-                    return {
-                        "answer": f"Both have won Champions League titles. Messi has {messi_value} Champions League titles, while Ronaldo has {ronaldo_value}.",
-                        "type": "direct_answer"
-                    }
-                elif "ballon" in specific_stat.lower():
-                    return {
-                        "answer": f"Lionel Messi has won {messi_value} Ballon d'Or awards. Cristiano Ronaldo has won {ronaldo_value} Ballon d'Or awards.",
-                        "type": "direct_answer"
-                    }
-
-        # Single player response
-        if comparison_type in ["messi_only", "ronaldo_only"]:
-            player_name = "Lionel Messi" if comparison_type == "messi_only" else "Cristiano Ronaldo"
-            player_key = "messi" if comparison_type == "messi_only" else "ronaldo"
-            
-            result = f"{player_name}'s {category_display} Statistics:\n\n"
-            for stat in stats:
-                desc, value = stat['description'], stat[f'{player_key}_value']
-                if desc:
-                    result += f"• {desc}: {value}\n"
-            
-            return {
-                "answer": result.strip(),
-                "type": "single_player",
-                "player": player_key,
-                "category": category_display,
-                "data": [dict(stat) for stat in stats]
-            }
+    if not stats:
+        return {
+            "answer": f"I don't have specific statistics about {category_display} right now.",
+            "type": "not_found"
+        }
 
-        # Specific stat comparison
-        if specific_stat:
-            matched_stat = None
-            for stat in stats:
-                if specific_stat.lower() in stat['description'].lower():
-                    matched_stat = stat
-                    break
+    # Handle direct questions about specific stats
+    if comparison_type == "direct_question" and specific_stat:
+        matched_stat = None
+        for stat in stats:
+            if specific_stat.lower() in stat.description.lower():
+                matched_stat = stat
+                break
 
-            if matched_stat:
-                messi_value = matched_stat['messi_value']
-                ronaldo_value = matched_stat['ronaldo_value']
-                description = matched_stat['description']
-
-                comparison_text = ""
-                if messi_value.isdigit() and ronaldo_value.isdigit():
-                    m, r = int(messi_value), int(ronaldo_value)
-                    if m > r:
-                        comparison_text = f"Messi leads with {m} compared to Ronaldo's {r}."
-                    elif r > m:
-                        comparison_text = f"Ronaldo leads with {r} compared to Messi's {m}."
-                    else:
-                        comparison_text = f"Both Messi and Ronaldo have {m}."
-                else:
-                    comparison_text = f"Messi: {messi_value}, Ronaldo: {ronaldo_value}"
+        if matched_stat:
+            messi_value = matched_stat.messi_value
+            ronaldo_value = matched_stat.ronaldo_value
+            description = matched_stat.description
 
+            if "world cup" in specific_stat.lower():
                 return {
-                    "answer": f"For {description}: {comparison_text}",
-                    "data": {
-                        "messi": messi_value,
-                        "ronaldo": ronaldo_value,
-                        "description": description
-                    },
-                    "type": "specific_comparison"
+                    "answer": f"Lionel Messi has won the World Cup (2022 with Argentina). Cristiano Ronaldo has not won a World Cup.",
+                    "type": "direct_answer"
+                }
+            elif "champions league" in specific_stat.lower():
+                return {
+                    "answer": f"Both have won Champions League titles. Messi has {messi_value} Champions League titles, while Ronaldo has {ronaldo_value}.",
+                    "type": "direct_answer"
+                }
+            elif "ballon" in specific_stat.lower():
+                return {
+                    "answer": f"Lionel Messi has won {messi_value} Ballon d'Or awards. Cristiano Ronaldo has won {ronaldo_value} Ballon d'Or awards.",
+                    "type": "direct_answer"
                 }
 
-        # General category comparison
-        result = f"Comparing {category_display} between Messi and Ronaldo:\n\n"
-        for stat in stats:
-            m, r, desc = stat['messi_value'], stat['ronaldo_value'], stat['description']
-            if desc:
-                result += f"• {desc}: Messi ({m}) vs Ronaldo ({r})\n"
-
+    # Single player response
+    if comparison_type in ["messi_only", "ronaldo_only"]:
+        player_key = "messi" if comparison_type == "messi_only" else "ronaldo"
+        
         return {
-            "answer": result.strip(),
-            "type": "category_comparison",
+            "answer": category_result.messi_text if player_key == "messi" else category_result.ronaldo_text,
+            "type": "single_player",
+            "player": player_key,
             "category": category_display,
-            "data": [dict(stat) for stat in stats]
+            "data": category_result.data_json
         }
 
-    finally:
-        conn.close()
+    # Specific stat comparison
+    if specific_stat:
+        matched_stat = None
+        for stat in stats:
+            if specific_stat.lower() in stat.description.lower():
+                matched_stat = stat
+                break
+
+        if matched_stat:
+            messi_value = matched_stat.messi_value
+            ronaldo_value = matched_stat.ronaldo_value
+            description = matched_stat.description
+
+            comparison_text = ""
+            if messi_value.isdigit() and ronaldo_value.isdigit():
+                m, r = int(messi_value), int(ronaldo_value)
+                if m > r:
+                    comparison_text = f"Messi leads with {m} compared to Ronaldo's {r}."
+                elif r > m:
+                    comparison_text = f"Ronaldo leads with {r} compared to Messi's {m}."
+                else:
+                    comparison_text = f"Both Messi and Ronaldo have {m}."
+            else:
+                comparison_text = f"Messi: {messi_value}, Ronaldo: {ronaldo_value}"
+
+            return {
+                "answer": f"For {description}: {comparison_text}",
+                "data": {
+                    "messi": messi_value,
+                    "ronaldo": ronaldo_value,
+                    "description": description
+                },
+                "type": "specific_comparison"
+            }
+
+    # General category comparison
+    return {
+        "answer": category_result.comparison_text,
+        "type": "category_comparison",
+        "category": category_display,
+        "data": category_result.data_json
+    }
 
 @app.route('/')
 def index():
@@ -299,19 +502,92 @@ def about():
     return render_template('about.html')
 
 @app.route('/ask', methods=['POST'])
+@shed_load
+@rate_limited(ask_limiter)
+@profiled
 def ask_question():
     data = request.get_json()
     question = data.get('question', '')
     if not question:
         return jsonify({"error": "No question provided"}), 400
+    session_id = data.get('session_id') or request.headers.get('X-Session-Id')
+    if session_id is not None and not (isinstance(session_id, str) and len(session_id) <= MAX_SESSION_ID_LENGTH):
+        return jsonify({"error": f"session_id must be a string of at most {MAX_SESSION_ID_LENGTH} characters"}), 400
 
-    category, specific_stat, comparison_type = extract_intent(question)
-    answer = get_answer(category, specific_stat, comparison_type)
-    answer['question'] = question
-    return jsonify(answer)
+    from snapshot import DataUnavailable
+    try:
+        return answer_question(data, question, session_id)
+    except (DataUnavailable, sqlite3.Error) as e:
+        print(f"Error answering question: {str(e)}")
+        return unavailable("Statistics are temporarily unavailable, please try again shortly", retry_after=5)
+
+def answer_question(data, question, session_id=None):
+    """Resolve the intent against the session context and build the JSON response"""
+    started = time.perf_counter()
+    context = context_store.get(session_id) if session_id else None
+    # Answers the page served from its cached bundle never reach the server, so it sends their intent along
+    hint = context_hint(data.get('context'))
+    if hint:
+        context = hint
+
+    category, specific_stat, comparison_type, inherited = extract_intent(question, context)
+    # The page may cache an answer only if it doesn't depend on the conversation so far
+    cacheable = not inherited
+
+    from players import find_players
+    player_keys = tuple(player.key for player in find_players(question))
+    if not player_keys and context and context.players and comparison_type == "general":
+        player_keys = context.players
+        cacheable = False
+    top_k = extract_top_k(question)
+
+    # Identical intents arriving together are answered once and shared
+    if top_k or set(player_keys) - {"messi", "ronaldo"}:
+        comparison_type = "players"
+        answer = answer_flight.do(("players", category, specific_stat, player_keys, top_k),
+                                  get_players_answer, category, specific_stat, player_keys, top_k)
+    else:
+        player_keys = ()
+        answer = answer_flight.do((category, specific_stat, comparison_type),
+                                  get_answer, category, specific_stat, comparison_type)
+    from db import data_version
+    answer = dict(answer, question=question, data_version=data_version(),
+                  intent={"category": category, "comparison_type": comparison_type},
+                  cacheable=cacheable and answer['type'] not in ["clarification", "not_found"])
+
+    if session_id and answer['type'] not in ["clarification", "not_found"]:
+        context_store.put(session_id, category, specific_stat, comparison_type, player_keys)
+
+    # Category data is already serialized in the snapshot, so it is spliced in rather than re-encoded
+    from snapshot import dumps_with_fragments
+    response = app.response_class(dumps_with_fragments(answer), mimetype='application/json')
+
+    if question_log:
+        question_log.record(
+            ts=round(time.time(), 3),
+            session=session_key(session_id),
+            question=normalize_question(question),
+            context=hint and loggable_context(hint._asdict()),
+            category=category,
+            specific_stat=specific_stat,
+            comparison_type=comparison_type,
+            players=list(player_keys),
+            top_k=top_k,
+            type=answer['type'],
+            cacheable=answer['cacheable'],
+            latency_ms=round((time.perf_counter() - started) * 1000, 3),
+        )
+    return response
 
 @app.route('/refresh-data', methods=['POST'])
+@rate_limited(write_limiter)
+@exclusive_write
+@profiled
 def api_refresh_data():
+    # Followers never scrape; the leader refreshes and every node picks up the published version
+    if distributor and not distributor.is_leader:
+        distributor.request_refresh()
+        return jsonify({"status": "accepted", "message": "Refresh requested from the refresh leader"}), 202
     try:
         success = refresh_data()
         if success:
@@ -321,23 +597,133 @@ def api_refresh_data():
     except Exception as e:
         return jsonify({"status": "error", "message": f"Error refreshing data: {str(e)}"}), 500
 
+@app.route('/bundle')
+@shed_load
+def get_bundle():
+    """Every category's answers and stats in one compact document, for the chat page to cache"""
+    from snapshot import get_snapshot, DataUnavailable
+    try:
+        snapshot = get_snapshot()
+    except DataUnavailable as e:
+        return unavailable(str(e), retry_after=5)
+    response = app.response_class(snapshot.bundle_json, mimetype='application/json')
+    response.set_etag(snapshot.version or "empty")
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @app.route('/categories')
+@shed_load
 def get_categories():
-    conn = get_database_connection()
-    cursor = conn.cursor()
+    from snapshot import get_snapshot, DataUnavailable
     try:
-        cursor.execute("SELECT * FROM categories")
-        categories = cursor.fetchall()
-        return jsonify([dict(c) for c in categories])
-    finally:
-        conn.close()
+        snapshot = get_snapshot()
+    except DataUnavailable as e:
+        return unavailable(str(e), retry_after=5)
+    return jsonify([{"id": c.id, "name": c.name, "display_name": c.display_name} for c in snapshot.categories])
+
+@app.route('/health')
+def health():
+    """Readiness and data freshness; 503 until there is data to answer from"""
+    import snapshot as snapshots
+    from db import data_version
+    try:
+        snapshot = snapshots.get_snapshot()
+    except snapshots.DataUnavailable as e:
+        return jsonify({"status": "unavailable", "ready": False, "message": str(e),
+                        "in_flight": request_slots.in_flight}), 503
+
+    # Degraded: answers come from the in-memory copy because the database is missing or unreadable
+    degraded = snapshot.version != data_version()
+    return jsonify({
+        "status": "degraded" if degraded else "ok",
+        "ready": True,
+        "source": "memory" if degraded else "database",
+        "data_version": snapshot.version,
+        "data_age_seconds": round(time.time() - snapshot.updated_at, 1),
+        "loaded_seconds_ago": round(time.time() - snapshot.loaded_at, 1),
+        "refreshing": write_lock.locked(),
+        "in_flight": request_slots.in_flight,
+        "max_in_flight": request_slots.max_in_flight,
+        "last_error": snapshots.last_error,
+        "distribution": distributor.status() if distributor else None,
+    })
+
+@app.route('/analytics')
+@shed_load
+def get_analytics():
+    """Vectorized full breakdown of every stat, optionally limited to one category"""
+    from analytics import get_summary
+    from snapshot import DataUnavailable
+    try:
+        summary = get_summary()
+    except DataUnavailable as e:
+        print(f"Error loading analytics: {str(e)}")
+        return unavailable("Analytics are temporarily unavailable, please try again shortly", retry_after=5)
+
+    category = request.args.get('category')
+    if not category:
+        return jsonify(summary)
+
+    categories = [c for c in summary["categories"] if c["name"] == category.lower()]
+    if not categories:
+        return jsonify({"status": "error", "message": f"Unknown category: {category}"}), 404
+
+    stats = summary["stats"]
+    keep = [i for i, name in enumerate(stats["category"]) if name == categories[0]["name"]]
+    return jsonify({
+        "data_version": summary["data_version"],
+        "categories": categories,
+        "stats": {key: [values[i] for i in keep] for key, values in stats.items()},
+    })
+
+@app.route('/profiles')
+@profiling_admin
+def list_profiles():
+    """Profiles in the buffer, newest first, and the current sampling rate"""
+    return jsonify({
+        "sample_rate": profiling.sample_rate,
+        "profiles": [record.summary() for record in reversed(profiling.profiles)],
+    })
+
+@app.route('/profiles/<int:profile_id>')
+@profiling_admin
+def download_profile(profile_id):
+    """Download a profile as folded stacks (default), pstats or text; speedscope for pyinstrument"""
+    record = profiling.get_profile(profile_id)
+    if record is None:
+        return jsonify({"status": "error", "message": f"No profile {profile_id}, it may have been evicted"}), 404
+    try:
+        body, mimetype, extension = profiling.render(record, request.args.get('format'))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    response = app.response_class(body, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="profile-{profile_id}.{extension}"'
+    return response
+
+@app.route('/profiles/config', methods=['POST'])
+@profiling_admin
+def configure_profiling():
+    """Change the sampling rate at runtime, e.g. {"sample_rate": 0.05}; 0 turns sampling off"""
+    data = request.get_json(silent=True) or {}
+    try:
+        profiling.set_sample_rate(data['sample_rate'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"status": "error", "message": "sample_rate must be a number between 0 and 1"}), 400
+    return jsonify({"status": "success", "sample_rate": profiling.sample_rate})
 
 @app.route('/initialize-db', methods=['POST'])
+@rate_limited(write_limiter)
+@exclusive_write
 def initialize_db():
     """Route for manually initializing the database with test data"""
+    if distributor and not distributor.is_leader:
+        return jsonify({"status": "error", "message": "Only the refresh leader can rewrite the data"}), 409
     try:
         from db import initialize_test_data
         success = initialize_test_data()
+        if distributor:
+            distributor.publish()
         return jsonify({"status": "success", "message": "Database initialized successfully"})
     except Exception as e:
         return jsonify({"status": "error", "message": f"Error initializing database: {str(e)}"}), 500
@@ -361,49 +747,89 @@ def check_database():
         conn.close()
 
 def create_database_tables():
-    """Create database tables if they don't exist"""
+    """Create database tables if they don't exist and migrate older layouts"""
+    from db import ensure_schema
     conn = get_database_connection()
-    cursor = conn.cursor()
-    
-    # Create tables
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS categories (
-        id INTEGER PRIMARY KEY,
-        name TEXT NOT NULL,
-        display_name TEXT NOT NULL
-    )
-    ''')
-    
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS stats (
-        id INTEGER PRIMARY KEY,
-        category_id INTEGER NOT NULL,
-        description TEXT,
-        messi_value TEXT,
-        ronaldo_value TEXT,
-        FOREIGN KEY (category_id) REFERENCES categories (id)
-    )
-    ''')
-    
-    conn.commit()
-    conn.close()
-    print("Database tables created")
+    try:
+        ensure_schema(conn)
+    finally:
+        conn.close()
 
-if __name__ == '__main__':
+def load_initial_data():
+    """Scrape live data; runs in the background while the seed data is served"""
+    with write_lock:
+        try:
+            refresh_data()
+            print("Initial data scraping completed")
+        except Exception as e:
+            print(f"Error scraping initial data: {str(e)}")
+            print("Still serving seed data. Use the Refresh Data button to try again")
+
+def prepare_database(scrape=True):
+    """Make sure there is data to answer from without blocking on a scrape"""
+    create_database_tables()
+    if check_database():
+        return None
+
+    print("Database is empty. Loading seed data" + (" and scraping in the background..." if scrape else "..."))
+    from db import initialize_test_data
+    initialize_test_data()
+    if not scrape:
+        return None
+
+    thread = threading.Thread(target=load_initial_data, name="initial-scrape", daemon=True)
+    thread.start()
+    return thread
+
+def join_snapshot_fleet():
+    """The leader prepares and publishes its data; followers start from the published snapshot"""
+    distributor.on_swap = warm_caches
+    distributor.on_refresh_request = refresh_for_followers
+    distributor.on_lead = lead_snapshot_fleet
+    if distributor.try_lead():
+        # Carry on from whatever a previous leader published
+        distributor.install()
+        prepare_database()
+        distributor.publish()
+    elif distributor.manifest():
+        distributor.install()
+    else:
+        # Nothing published yet; serve local or seed data until the leader publishes, without scraping
+        prepare_database(scrape=False)
+    distributor.start()
+
+def lead_snapshot_fleet():
+    """A follower that took over the leadership scrapes if the previous leader never published"""
+    if not distributor.manifest():
+        threading.Thread(target=load_initial_data, name="initial-scrape", daemon=True).start()
+
+database_prepared = threading.Event()
+prepare_lock = threading.Lock()
+
+@app.before_request
+def ensure_database_prepared():
+    """Prepare the database once per process, including under WSGI servers that never run __main__"""
+    if database_prepared.is_set():
+        return
+    # Requests arriving while another one prepares carry on and are served in degraded mode
+    if not prepare_lock.acquire(blocking=False):
+        return
     try:
-        if not check_database():
-            # Create tables first
-            create_database_tables()
-            
-            # Try to scrape initial data
-            print("Database is empty. Scraping initial data...")
-            try:
-                refresh_data()
-                print("Initial data scraping completed")
-            except Exception as e:
-                print(f"Error scraping initial data: {str(e)}")
-                print("You can initialize the database with test data using the /initialize-db endpoint")
+        if not database_prepared.is_set():
+            if distributor:
+                join_snapshot_fleet()
+            else:
+                prepare_database()
+            database_prepared.set()
     except Exception as e:
         print(f"Error during database setup: {str(e)}")
+    finally:
+        prepare_lock.release()
+
+if __name__ == '__main__':
+    debug = True
+    # The debug reloader imports this module twice; only the serving child prepares data
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        ensure_database_prepared()
 
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=debug, port=int(os.environ.get('PORT', 5000)))
\ No newline at end of file
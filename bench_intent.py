@@ -0,0 +1,111 @@
+"""Latency and accuracy benchmark for question intent extraction.
+
+Runs a fixed set of labelled questions through the keyword fallback, the
+TF-IDF matcher (with its question cache cleared and warm) and the full
+extract_intent, and reports the per-question latency and how many questions
+land in the expected category, so matcher regressions show up as numbers.
+
+    python bench_intent.py --rounds 2000 --max-extract-us 15 --min-accuracy 0.95
+"""
+import argparse
+import statistics
+import sys
+import time
+
+# (question, expected category), phrased the way users ask rather than like the templates
+CASES = [
+    ("how many times did Messi find the net from dead balls", "free_kicks"),
+    ("who has more goals", "goals"),
+    ("Messi assists", "assists"),
+    ("who won more trophies", "trophies"),
+    ("how many ballon d'or does ronaldo have", "awards"),
+    ("world cup goals messi vs ronaldo", "international"),
+    ("who has more hat-tricks", "hat_tricks"),
+    ("penalty record of ronaldo", "penalties"),
+    ("who creates more chances for teammates", "assists"),
+    ("who has more silverware", "trophies"),
+    ("spot kick goals", "penalties"),
+    ("how many games has messi played", "career"),
+    ("who is better for the national team", "international"),
+    ("goals per game", "career"),
+    ("champions league goals", "goals"),
+    ("who scored more free kicks", "free_kicks"),
+    ("messi club career", "club"),
+    ("who has more individual honours", "awards"),
+    ("compare their scoring", "goals"),
+    ("what is ronaldo's penalty conversion rate", "penalties"),
+]
+
+
+def measure(fn, questions, rounds, before_round=None):
+    """Median microseconds per question over `rounds` passes through `questions`"""
+    timings = []
+    for _ in range(rounds):
+        if before_round:
+            before_round()
+        start = time.perf_counter()
+        for question in questions:
+            fn(question)
+        timings.append((time.perf_counter() - start) / len(questions) * 1e6)
+    return statistics.median(timings)
+
+
+def accuracy(classify):
+    return sum(classify(question) == expected for question, expected in CASES) / len(CASES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--max-extract-us", type=float, help="fail if extract_intent takes longer per question")
+    parser.add_argument("--min-accuracy", type=float, help="fail if extract_intent gets fewer categories right")
+    parser.add_argument("--verbose", action="store_true", help="list the questions extract_intent gets wrong")
+    args = parser.parse_args()
+
+    import intent_index
+    from app import extract_intent, keyword_category
+    from players import get_player_index
+
+    # Loading the index and the players is startup cost, not per-question cost
+    intent_index.get_index()
+    get_player_index()
+    questions = [question.lower() for question, _ in CASES]
+
+    def matched_category(question):
+        match = intent_index.match_intent(question)
+        return match[0] if match else keyword_category(question.lower())
+
+    rows = [
+        ("keyword_category", measure(keyword_category, questions, args.rounds),
+         accuracy(lambda question: keyword_category(question.lower()))),
+        ("match_intent (uncached)", measure(intent_index.match_intent, questions, args.rounds,
+                                            intent_index._match.cache_clear), accuracy(matched_category)),
+        ("match_intent (repeat)", measure(intent_index.match_intent, questions, args.rounds), None),
+        ("extract_intent", measure(extract_intent, questions, args.rounds),
+         accuracy(lambda question: extract_intent(question)[0])),
+    ]
+    for label, micros, correct in rows:
+        line = f"{label:24s} {micros:7.2f} us/question"
+        if correct is not None:
+            line += f"  {correct:6.1%} of {len(CASES)} categories right"
+        print(line)
+
+    if args.verbose:
+        for question, expected in CASES:
+            got = extract_intent(question)[0]
+            if got != expected:
+                print(f"  expected {expected}, got {got}: {question}")
+
+    failed = False
+    extract_micros, extract_accuracy = rows[-1][1], rows[-1][2]
+    if args.max_extract_us and extract_micros > args.max_extract_us:
+        print(f"extract_intent above the {args.max_extract_us} us budget")
+        failed = True
+    if args.min_accuracy and extract_accuracy < args.min_accuracy:
+        print(f"extract_intent accuracy below {args.min_accuracy:.0%}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Cold-start benchmark for the web app.
+
+Measures how long `import app` takes in a fresh interpreter and how long
+`python app.py` takes to answer its first request when started against an
+empty database, so startup regressions show up as numbers.
+
+    python bench_startup.py --runs 5 --max-import-ms 400 --max-ready-ms 3000
+"""
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+APP_FILES = ["app.py", "db.py", "scraper.py", "context_store.py", "ratelimit.py",
+             "analytics.py", "intent_index.py", "snapshot.py", "players.py", "profiling.py",
+             "question_log.py", "distribution.py", "templates", "static"]
+
+# Modules that should only be imported once a request needs them
+LAZY_MODULES = ["requests", "bs4", "numpy"]
+
+IMPORT_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+loaded = [name for name in {lazy!r} if name in sys.modules]
+print(elapsed, ",".join(loaded))
+"""
+
+
+def measure_import(runs):
+    """Time `import app` in fresh interpreters; returns (timings in ms, eagerly loaded modules)"""
+    timings = []
+    eager = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(lazy=LAZY_MODULES)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        timings.append(float(output[0]) * 1000)
+        if len(output) > 1:
+            eager.update(output[1].split(","))
+    return timings, sorted(eager)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_ready(runs, timeout=30):
+    """Start app.py against an empty database and time the first successful /categories"""
+    timings = []
+    for _ in range(runs):
+        workdir = tempfile.mkdtemp(prefix="statbot-bench-")
+        try:
+            for name in APP_FILES:
+                source = os.path.join(ROOT, name)
+                if os.path.isdir(source):
+                    shutil.copytree(source, os.path.join(workdir, name))
+                elif os.path.exists(source):
+                    shutil.copy(source, workdir)
+
+            port = _free_port()
+            env = dict(os.environ, PORT=str(port))
+            start = time.perf_counter()
+            server = subprocess.Popen([sys.executable, "app.py"], cwd=workdir, env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                while True:
+                    if time.perf_counter() - start > timeout:
+                        raise RuntimeError(f"Server did not answer within {timeout}s")
+                    try:
+                        with urllib.request.urlopen(f"http://127.0.0.1:{port}/categories", timeout=1) as response:
+                            if response.status == 200:
+                                break
+                    except OSError:
+                        time.sleep(0.01)
+                timings.append((time.perf_counter() - start) * 1000)
+            finally:
+                server.terminate()
+                server.wait()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return timings
+
+
+def _report(label, timings):
+    print(f"{label}: median {statistics.median(timings):.1f} ms, "
+          f"min {min(timings):.1f} ms, max {max(timings):.1f} ms over {len(timings)} runs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, help="fail if the median import time exceeds this")
+    parser.add_argument("--max-ready-ms", type=float, help="fail if the median time to first response exceeds this")
+    parser.add_argument("--skip-server", action="store_true", help="only measure the import time")
+    args = parser.parse_args()
+
+    failed = False
+
+    import_timings, eager = measure_import(args.runs)
+    _report("import app", import_timings)
+    if eager:
+        print(f"Imported eagerly (should be lazy): {', '.join(eager)}")
+        failed = True
+    if args.max_import_ms and statistics.median(import_timings) > args.max_import_ms:
+        print(f"Import time above the {args.max_import_ms} ms budget")
+        failed = True
+
+    if not args.skip_server:
+        ready_timings = measure_ready(args.runs)
+        _report("first response (empty database)", ready_timings)
+        if args.max_ready_ms and statistics.median(ready_timings) > args.max_ready_ms:
+            print(f"Time to first response above the {args.max_ready_ms} ms budget")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
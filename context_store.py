@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# Last resolved intent for a session; kept as a tuple so each record stays small
+SessionContext = namedtuple("SessionContext",
+                            ["category", "specific_stat", "comparison_type", "updated_at", "players"],
+                            defaults=[()])
+
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_TTL = 30 * 60
+
+
+class MemoryContextStore:
+    """In-process LRU store with a per-record time-to-live"""
+
+    def __init__(self, max_sessions=DEFAULT_MAX_SESSIONS, ttl=DEFAULT_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            record = self._records.get(session_id)
+            if record is None:
+                return None
+            if time.time() - record.updated_at > self.ttl:
+                del self._records[session_id]
+                return None
+            self._records.move_to_end(session_id)
+            return record
+
+    def put(self, session_id, category, specific_stat, comparison_type, players=()):
+        now = time.time()
+        with self._lock:
+            self._records[session_id] = SessionContext(category, specific_stat, comparison_type, now, tuple(players))
+            self._records.move_to_end(session_id)
+
+            # Least recently used records sit at the front, so expired ones are found there first
+            while self._records:
+                oldest = next(iter(self._records.values()))
+                if now - oldest.updated_at <= self.ttl and len(self._records) <= self.max_sessions:
+                    break
+                self._records.popitem(last=False)
+
+    def clear(self, session_id):
+        with self._lock:
+            self._records.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._records)
+
+
+class RedisContextStore:
+    """Shared store for multi-worker deployments backed by a Redis-like client
+
+    Any client exposing get(key), set(key, value, ex=seconds) and delete(key)
+    works, so a local stand-in can be used in place of a real Redis server.
+    """
+
+    def __init__(self, client, ttl=DEFAULT_TTL, prefix="statbot:context:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, session_id):
+        raw = self.client.get(self.prefix + session_id)
+        if raw is None:
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        record = json.loads(raw)
+        return SessionContext(*record[:4], tuple(record[4]) if len(record) > 4 else ())
+
+    def put(self, session_id, category, specific_stat, comparison_type, players=()):
+        record = [category, specific_stat, comparison_type, time.time(), list(players)]
+        self.client.set(self.prefix + session_id, json.dumps(record), ex=self.ttl)
+
+    def clear(self, session_id):
+        self.client.delete(self.prefix + session_id)
+
+
+def create_context_store():
+    """Pick the store from the environment: Redis when REDIS_URL is set, memory otherwise"""
+    ttl = int(os.environ.get("CONTEXT_TTL", DEFAULT_TTL))
+    redis_url = os.environ.get("REDIS_URL")
+    if redis_url:
+        import redis
+        return RedisContextStore(redis.Redis.from_url(redis_url), ttl=ttl)
+
+    max_sessions = int(os.environ.get("CONTEXT_MAX_SESSIONS", DEFAULT_MAX_SESSIONS))
+    return MemoryContextStore(max_sessions=max_sessions, ttl=ttl)
@@ -1,16 +1,57 @@
+import os
+import re
 import sqlite3
 import datetime
+from urllib.parse import quote
 
-def initialize_test_data():
-    """Initialize the database with test data for Messi vs Ronaldo statistics"""
-    
-    print("Initializing database with test data...")
-    
-    # Create/connect to SQLite database
-    conn = sqlite3.connect('football_stats.db')
+DB_PATH = 'football_stats.db'
+
+# Seconds a connection waits on a locked database before giving up
+DB_TIMEOUT = float(os.environ.get('DB_TIMEOUT', '2'))
+
+# Columns added to the stats table after the first release, with their definitions
+STATS_MIGRATIONS = [
+    ("last_updated", "TEXT"),
+    ("stat_key", "TEXT"),
+]
+
+# Players whose values live in the legacy messi_value/ronaldo_value columns, with their aliases
+LEGACY_PLAYERS = [
+    ("messi", "Lionel Messi", ["messi", "lionel messi", "lionel", "leo messi", "leo"]),
+    ("ronaldo", "Cristiano Ronaldo", ["ronaldo", "cristiano ronaldo", "cristiano", "cr7"]),
+]
+
+def data_version(db_path=DB_PATH):
+    """Return a token that changes whenever the database file is rewritten"""
+    try:
+        st = os.stat(db_path)
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+def connect(db_path=DB_PATH, readonly=False, timeout=DB_TIMEOUT):
+    """Open the database with a bounded busy wait; read-only connections never create a missing file"""
+    if readonly:
+        return sqlite3.connect(f"file:{quote(os.path.abspath(db_path))}?mode=ro", uri=True, timeout=timeout)
+    return sqlite3.connect(db_path, timeout=timeout)
+
+def stat_key_for(description):
+    """Stable key for a stat description, e.g. "Free Kick Goals" -> "free_kick_goals" """
+    return re.sub(r'[^a-z0-9]+', '_', (description or '').lower()).strip('_')
+
+def normalize_alias(alias):
+    """Lowercase words separated by single spaces, the form aliases are stored and looked up in"""
+    return " ".join(re.findall(r'[a-z0-9]+', alias.lower()))
+
+def numeric_value(value):
+    """Numeric part of a stored value ("78%" -> 78.0), or None when there is none"""
+    match = re.search(r'-?\d+(?:\.\d+)?', str(value or '').replace(',', ''))
+    return float(match.group(0)) if match else None
+
+def ensure_schema(conn):
+    """Create the tables if needed and bring older databases up to the current schema"""
     cursor = conn.cursor()
     
-    # Create tables if they don't exist
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS categories (
         id INTEGER PRIMARY KEY,
@@ -31,6 +72,100 @@ def initialize_test_data():
     )
     ''')
     
+    cursor.execute("PRAGMA table_info(stats)")
+    existing = {row[1] for row in cursor.fetchall()}
+    migrated = False
+    for column, definition in STATS_MIGRATIONS:
+        if column not in existing:
+            print(f"Migrating stats table: adding {column}")
+            cursor.execute(f"ALTER TABLE stats ADD COLUMN {column} {definition}")
+            migrated = True
+    
+    # Players and their values in long format, so any number of players can be stored
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS players (
+        id INTEGER PRIMARY KEY,
+        key TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL
+    )
+    ''')
+    
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS player_aliases (
+        alias TEXT PRIMARY KEY,
+        player_id INTEGER NOT NULL,
+        FOREIGN KEY (player_id) REFERENCES players (id)
+    ) WITHOUT ROWID
+    ''')
+    
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS player_stats (
+        player_id INTEGER NOT NULL,
+        stat_key TEXT NOT NULL,
+        value TEXT,
+        numeric_value REAL,
+        PRIMARY KEY (player_id, stat_key),
+        FOREIGN KEY (player_id) REFERENCES players (id)
+    ) WITHOUT ROWID
+    ''')
+    
+    # Covering index for "top N players by stat" lookups
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_player_stats_top
+    ON player_stats (stat_key, numeric_value DESC, player_id, value)
+    ''')
+    
+    # Writers (the scraper, initialize_test_data) sync after every change, so the legacy values only
+    # need copying when an older database is first migrated; any other write here would change
+    # data_version() on every start without the data changing
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM players)")
+    if migrated or not cursor.fetchone()[0]:
+        sync_player_stats(conn)
+    conn.commit()
+
+def add_player(conn, key, name, aliases=(), values=None):
+    """Insert or update a player, their aliases and a {stat_key: value} mapping"""
+    cursor = conn.cursor()
+    cursor.execute("INSERT OR IGNORE INTO players (key, name) VALUES (?, ?)", (key, name))
+    cursor.execute("UPDATE players SET name = ? WHERE key = ?", (name, key))
+    cursor.execute("SELECT id FROM players WHERE key = ?", (key,))
+    player_id = cursor.fetchone()[0]
+    
+    cursor.executemany("INSERT OR REPLACE INTO player_aliases (alias, player_id) VALUES (?, ?)",
+                       [(normalize_alias(alias), player_id) for alias in {key, name, *aliases}])
+    
+    if values:
+        cursor.executemany("""
+            INSERT OR REPLACE INTO player_stats (player_id, stat_key, value, numeric_value)
+            VALUES (?, ?, ?, ?)
+        """, [(player_id, stat_key, value, numeric_value(value)) for stat_key, value in values.items()])
+    return player_id
+
+def sync_player_stats(conn):
+    """Copy the legacy messi_value/ronaldo_value columns into the long-format player_stats table"""
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT id, description FROM stats WHERE stat_key IS NULL")
+    cursor.executemany("UPDATE stats SET stat_key = ? WHERE id = ?",
+                       [(stat_key_for(description), stat_id) for stat_id, description in cursor.fetchall()])
+    
+    for key, name, aliases in LEGACY_PLAYERS:
+        cursor.execute(f"SELECT stat_key, {key}_value FROM stats WHERE stat_key != ''")
+        values = dict(cursor.fetchall())
+        # The legacy columns are the source of truth for these players
+        cursor.execute("DELETE FROM player_stats WHERE player_id IN (SELECT id FROM players WHERE key = ?)", (key,))
+        add_player(conn, key, name, aliases, values)
+
+def initialize_test_data():
+    """Initialize the database with test data for Messi vs Ronaldo statistics"""
+    
+    print("Initializing database with test data...")
+    
+    # Create/connect to SQLite database
+    conn = sqlite3.connect(DB_PATH)
+    ensure_schema(conn)
+    cursor = conn.cursor()
+    
     # Clear existing data
     cursor.execute("DELETE FROM stats")
     cursor.execute("DELETE FROM categories")
@@ -120,6 +255,7 @@ def initialize_test_data():
         (id, category_id, description, messi_value, ronaldo_value, last_updated)
         VALUES (?, ?, ?, ?, ?, ?)
     """, stats)
+    sync_player_stats(conn)
     
     # Commit changes and close connection
     conn.commit()
@@ -0,0 +1,211 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+from db import DB_PATH, DB_TIMEOUT, data_version
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Published snapshots older than the newest few are deleted
+KEEP_VERSIONS = 3
+
+MANIFEST = "CURRENT"
+LEADER_LOCK = "leader.lock"
+REFRESH_REQUEST = "refresh.requested"
+
+
+def _write_atomic(path, text):
+    """Readers see either the old or the new contents, never a partial write"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _copy_with_mtime(source, target):
+    """Copy a database file and give it the source's mtime, so data_version() matches on every node"""
+    tmp = f"{target}.{os.getpid()}.incoming"
+    shutil.copyfile(source, tmp)
+    st = os.stat(source)
+    os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(tmp, target)
+
+
+class SnapshotDistributor:
+    """Shares one data version across processes and hosts through a snapshot directory.
+
+    The leader scrapes, copies the database into the directory as a versioned file and
+    points the CURRENT manifest at it. Followers watch the manifest and swap the new file
+    in as their local database, so they never scrape and every node reports the same
+    data_version.
+    """
+
+    def __init__(self, directory, role="auto", db_path=DB_PATH, poll_seconds=1.0):
+        self.directory = directory
+        self.role = role
+        self.db_path = db_path
+        self.poll_seconds = poll_seconds
+        self.is_leader = False
+        self.on_swap = None
+        self.on_refresh_request = None
+        self.on_lead = None
+        self._lock_file = None
+        self._manifest_mtime = None
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def try_lead(self):
+        """Take leadership if the role allows it and no other process holds the leader lock"""
+        if self.is_leader or self.role == "follower":
+            return self.is_leader
+        lock_file = open(self._path(LEADER_LOCK), "a+")
+        try:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            if self.role == "leader":
+                print("Another process holds the snapshot leader lock; leading anyway as configured")
+                self.is_leader = True
+            return self.is_leader
+        # Held open for the life of the process; the lock is released if it dies
+        self._lock_file = lock_file
+        self.is_leader = True
+        print(f"Process {os.getpid()} is the snapshot refresh leader")
+        return True
+
+    def manifest(self):
+        """The published {"version", "file", "published_at"}, or None before the first publish"""
+        try:
+            with open(self._path(MANIFEST), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def publish(self):
+        """Copy the local database into a new versioned snapshot and point CURRENT at it"""
+        if not self.is_leader:
+            raise RuntimeError("Only the snapshot refresh leader may publish")
+        version = data_version(self.db_path)
+        manifest = self.manifest()
+        if manifest and manifest["version"] == version:
+            return manifest
+
+        name = f"stats-{version}.db"
+        tmp = self._path(f"{name}.tmp")
+        # The backup API gives a consistent copy even while the database is in use
+        source = sqlite3.connect(self.db_path, timeout=DB_TIMEOUT)
+        target = sqlite3.connect(tmp)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        st = os.stat(self.db_path)
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp, self._path(name))
+
+        manifest = {"version": data_version(self._path(name)), "file": name, "published_at": time.time()}
+        _write_atomic(self._path(MANIFEST), json.dumps(manifest))
+        print(f"Published data version {manifest['version']}")
+
+        # The copy can differ in size from the original, so the leader serves the published file too
+        if manifest["version"] != data_version(self.db_path):
+            self.install(manifest)
+        self._prune(name)
+        return manifest
+
+    def install(self, manifest=None):
+        """Swap the published snapshot in as the local database; returns True if the data changed"""
+        manifest = manifest or self.manifest()
+        if not manifest or manifest["version"] == data_version(self.db_path):
+            return False
+        _copy_with_mtime(self._path(manifest["file"]), self.db_path)
+        print(f"Switched to published data version {manifest['version']}")
+        if self.on_swap:
+            self.on_swap()
+        return True
+
+    def _prune(self, keep):
+        published = sorted((name for name in os.listdir(self.directory)
+                            if name.startswith("stats-") and name.endswith(".db")),
+                           key=lambda name: os.path.getmtime(self._path(name)), reverse=True)
+        for name in published[KEEP_VERSIONS:]:
+            if name != keep:
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    pass  # a follower may still be copying it
+
+    def request_refresh(self):
+        """Ask the leader for a refresh; followers call this instead of scraping themselves"""
+        _write_atomic(self._path(REFRESH_REQUEST), str(time.time()))
+
+    def start(self):
+        """Start watching the directory: followers for new versions, the leader for refresh requests"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="snapshot-watch", daemon=True)
+            self._thread.start()
+
+    def _watch(self):
+        while True:
+            try:
+                self._poll()
+            except Exception as e:
+                print(f"Error watching snapshots: {str(e)}")
+            time.sleep(self.poll_seconds)
+
+    def _poll(self):
+        if not self.is_leader and self.try_lead():
+            # Take over from a leader that went away, starting from the data it last published
+            self.install()
+            if self.on_lead:
+                self.on_lead()
+
+        if self.is_leader:
+            if os.path.exists(self._path(REFRESH_REQUEST)):
+                os.remove(self._path(REFRESH_REQUEST))
+                if self.on_refresh_request:
+                    self.on_refresh_request()
+            return
+
+        try:
+            mtime = os.stat(self._path(MANIFEST)).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._manifest_mtime:
+            self.install()
+            # Recorded only once the install worked, so a failed one is retried on the next poll
+            self._manifest_mtime = mtime
+
+    def status(self):
+        manifest = self.manifest()
+        return {
+            "role": "leader" if self.is_leader else "follower",
+            "published_version": manifest and manifest["version"],
+            "published_at": manifest and manifest["published_at"],
+        }
+
+
+def create_distributor():
+    """Snapshot distributor from SNAPSHOT_DIR (unset keeps the node standalone) and SNAPSHOT_ROLE"""
+    directory = os.environ.get('SNAPSHOT_DIR')
+    if not directory:
+        return None
+    return SnapshotDistributor(
+        directory,
+        role=os.environ.get('SNAPSHOT_ROLE', 'auto'),
+        poll_seconds=float(os.environ.get('SNAPSHOT_POLL_SECONDS', '1')),
+    )
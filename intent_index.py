@@ -0,0 +1,299 @@
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+from db import DB_PATH, connect, data_version
+
+INDEX_PATH = 'intent_index.npz'
+
+# Minimum cosine similarity for a match to be trusted over the keyword fallback
+MATCH_THRESHOLD = 0.3
+
+# Canonical phrasings for each category, with an optional specific stat
+TEMPLATES = [
+    # Goals
+    ("goals", "goals", None),
+    ("goal scoring record", "goals", None),
+    ("who has scored more goals", "goals", None),
+    ("total career goals", "goals", None),
+    ("how many goals has he scored", "goals", None),
+    ("who finds the net more often", "goals", None),
+    ("who is the better goal scorer", "goals", None),
+    ("who is the better finisher", "goals", None),
+    ("champions league goals", "goals", "champions_league"),
+    ("ucl goals scored in europe", "goals", "champions_league"),
+    ("la liga goals", "goals", "la_liga"),
+    ("premier league goals", "goals", "premier_league"),
+    ("serie a goals", "goals", "serie_a"),
+    # Assists
+    ("assists", "assists", None),
+    ("who has more assists", "assists", None),
+    ("total career assists", "assists", None),
+    ("who sets up more goals for teammates", "assists", None),
+    ("who creates more chances", "assists", None),
+    ("who is the better passer and playmaker", "assists", None),
+    ("champions league assists", "assists", "champions_league"),
+    # Trophies
+    ("trophies", "trophies", None),
+    ("who has won more trophies", "trophies", None),
+    ("total major trophies and titles", "trophies", None),
+    ("who has more silverware", "trophies", None),
+    ("league titles won", "trophies", None),
+    ("who won the world cup", "trophies", "world_cup"),
+    ("world cup titles", "trophies", "world_cup"),
+    ("who has won more champions league titles", "trophies", "champions_league"),
+    ("copa america titles", "trophies", None),
+    ("european championship euro titles", "trophies", None),
+    # Awards
+    ("awards", "awards", None),
+    ("who has more individual awards", "awards", None),
+    ("how many ballon d'or awards", "awards", "ballon_dor"),
+    ("ballon dor wins", "awards", "ballon_dor"),
+    ("fifa best player awards", "awards", None),
+    ("golden boot awards", "awards", None),
+    ("individual honours and accolades", "awards", None),
+    ("world cup golden ball", "awards", None),
+    # International
+    ("international", "international", None),
+    ("international goals for the national team", "international", None),
+    ("who has done better for his country", "international", None),
+    ("international career record", "international", None),
+    ("world cup goals", "international", "world_cup"),
+    ("world cup appearances", "international", "world_cup"),
+    ("international assists for his nation", "international", None),
+    # Club
+    ("club", "club", None),
+    ("club career performance", "club", None),
+    ("club goals for barcelona real madrid manchester united juventus psg", "club", None),
+    ("league goals and assists at club level", "club", None),
+    ("club performance comparison", "club", None),
+    # Career
+    ("career", "career", None),
+    ("overall career statistics", "career", None),
+    ("games played appearances matches", "career", None),
+    ("goals per game ratio", "career", None),
+    ("assists per game ratio", "career", None),
+    ("career overview total numbers", "career", None),
+    # Hat tricks
+    ("hat tricks", "hat_tricks", None),
+    ("who has more hat tricks", "hat_tricks", None),
+    ("career hat-tricks", "hat_tricks", None),
+    ("three goals in one match", "hat_tricks", None),
+    ("international hat tricks", "hat_tricks", None),
+    ("club hat tricks", "hat_tricks", None),
+    # Free kicks
+    ("free kicks", "free_kicks", None),
+    ("free kick goals", "free_kicks", None),
+    ("who has scored more free kicks", "free_kicks", None),
+    ("goals from dead ball situations", "free_kicks", None),
+    ("who finds the net from dead balls and set pieces", "free_kicks", None),
+    ("direct free-kick goals", "free_kicks", None),
+    # Penalties
+    ("penalties", "penalties", None),
+    ("penalty goals", "penalties", None),
+    ("who has scored more penalties", "penalties", None),
+    ("spot kicks from the penalty spot", "penalties", None),
+    ("penalty conversion rate", "penalties", None),
+    ("missed penalties", "penalties", None),
+]
+
+# Words that carry no category signal (player names appear in nearly every question)
+STOP_WORDS = {
+    "a", "an", "the", "and", "or", "of", "in", "on", "for", "to", "from", "at", "by", "with",
+    "who", "what", "which", "how", "many", "much", "is", "are", "was", "were", "be", "been",
+    "has", "have", "had", "do", "does", "did", "he", "his", "him", "they", "their", "than",
+    "more", "most", "better", "times", "time", "tell", "me", "about", "between", "vs", "versus",
+    "messi", "lionel", "leo", "ronaldo", "cristiano", "cr7", "compare", "comparison", "number",
+}
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+_index = None
+_index_lock = threading.Lock()
+
+
+@lru_cache(maxsize=4096)
+def _stem(word):
+    """Crude suffix stripping so scored/scoring/scores share a feature"""
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    for suffix in ("ing", "ed", "es", "s", "e"):
+        if word.endswith(suffix) and not word.endswith("ss") and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+@lru_cache(maxsize=8192)
+def _feature_word(word):
+    """Stemmed form of a word, or "" for stop words"""
+    if word in STOP_WORDS:
+        return ""
+    return _stem(word.replace("'", ""))
+
+
+def tokenize(text):
+    """Lowercased, stemmed unigrams plus adjacent bigrams, stop words removed"""
+    words = [w for w in map(_feature_word, _WORD.findall(text.lower().replace("-", " "))) if w]
+    return words + [a + " " + b for a, b in zip(words, words[1:])]
+
+
+def _stat_documents(db_path):
+    """Stat descriptions from the database, labelled with their category"""
+    try:
+        # Read-only with the short busy wait, so a locked or missing database never stalls the first question
+        conn = connect(db_path, readonly=True)
+    except sqlite3.Error:
+        return []
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT s.description, c.name FROM stats s
+            JOIN categories c ON c.id = s.category_id
+            WHERE s.description IS NOT NULL
+        """)
+        return [(description, category, None) for description, category in cursor.fetchall()]
+    except sqlite3.Error:
+        return []
+    finally:
+        conn.close()
+
+
+def _documents_hash(documents):
+    digest = hashlib.sha1()
+    for text, category, specific_stat in documents:
+        digest.update(f"{text}|{category}|{specific_stat}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def build_index(db_path=DB_PATH):
+    """Build the TF-IDF matrix over the templates and stored stat descriptions"""
+    documents = TEMPLATES + _stat_documents(db_path)
+    tokenized = [tokenize(text) for text, _, _ in documents]
+
+    vocabulary = sorted({token for tokens in tokenized for token in tokens})
+    position = {token: i for i, token in enumerate(vocabulary)}
+
+    counts = np.zeros((len(documents), len(vocabulary)), dtype=np.float32)
+    for row, tokens in enumerate(tokenized):
+        for token in tokens:
+            counts[row, position[token]] += 1
+
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = (np.log((1 + len(documents)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+    matrix = counts * idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1, norms)
+
+    return {
+        "vocabulary": np.array(vocabulary),
+        "idf": idf,
+        "matrix": matrix,
+        "categories": np.array([category for _, category, _ in documents]),
+        "specific_stats": np.array([specific_stat or "" for _, _, specific_stat in documents]),
+        "documents_hash": np.array(_documents_hash(documents)),
+    }
+
+
+def save_index(index, path=INDEX_PATH):
+    np.savez_compressed(path, **index)
+
+
+def load_index(path=INDEX_PATH, db_path=DB_PATH):
+    """Load the prebuilt index, rebuilding in memory if it is missing or stale"""
+    if os.path.exists(path):
+        with np.load(path) as data:
+            index = {key: data[key] for key in data.files}
+        # Stale when either the templates or the stat descriptions in the database have changed
+        if str(index.get("documents_hash")) == _documents_hash(TEMPLATES + _stat_documents(db_path)):
+            return index
+        print("Intent index is out of date with the templates or stats, rebuilding")
+    return build_index(db_path)
+
+
+def _prepare(index, version=None):
+    """Attach the token -> column lookup used at query time, and the data version it was built for"""
+    index["data_version"] = version
+    index["position"] = {token: i for i, token in enumerate(index["vocabulary"].tolist())}
+    # Per feature, the (document, weight) pairs where it is non-zero; a query only walks the
+    # postings of the few features it contains instead of multiplying the whole matrix
+    index["postings"] = [[(int(doc), float(row[doc])) for doc in np.flatnonzero(row)]
+                         for row in index["matrix"].T]
+    index["idf_list"] = index["idf"].tolist()
+    index["category_list"] = index["categories"].tolist()
+    index["specific_list"] = index["specific_stats"].tolist()
+    # The words a question must contain before a template's specific stat is taken from it
+    index["specific_terms"] = {specific: frozenset(tokenize(specific.replace("_", " ")))
+                               for specific in set(index["specific_list"]) if specific}
+    return index
+
+
+def get_index(db_path=DB_PATH):
+    """The prepared index, reloaded whenever the database (and so its stat descriptions) changes"""
+    global _index
+    version = data_version(db_path)
+    index = _index
+    if index is None or index["data_version"] != version:
+        with _index_lock:
+            if _index is None or _index["data_version"] != version:
+                _index = _prepare(load_index(db_path=db_path), version)
+            index = _index
+    return index
+
+
+def match_intent(question):
+    """Return (category, specific_stat, score) for the nearest template, or None"""
+    index = get_index()
+    return _match(question.lower(), index["data_version"])
+
+
+@lru_cache(maxsize=4096)
+def _match(question, version):
+    # Keyed on the data version too, so matches cached against an older index are never reused
+    index = _index if _index is not None and _index["data_version"] == version else get_index()
+    position = index["position"]
+
+    tokens = tokenize(question)
+    counts = {}
+    for token in tokens:
+        column = position.get(token)
+        if column is not None:
+            counts[column] = counts.get(column, 0) + 1
+    if not counts:
+        return None
+
+    # Sparse matrix-vector product against the L2-normalized document rows
+    idf = index["idf_list"]
+    postings = index["postings"]
+    scores = {}
+    norm = 0.0
+    for column, count in counts.items():
+        weight = count * idf[column]
+        norm += weight * weight
+        for doc, value in postings[column]:
+            scores[doc] = scores.get(doc, 0.0) + weight * value
+    # Lowest document wins ties, as argmax over the dense scores would
+    best = max(sorted(scores), key=scores.get)
+    score = scores[best] / math.sqrt(norm)
+    if score < MATCH_THRESHOLD:
+        return None
+    # "who has won more cups" is close to a World Cup template, but doesn't ask about the World Cup
+    specific_stat = index["specific_list"][best] or None
+    if specific_stat and not index["specific_terms"][specific_stat].issubset(tokens):
+        specific_stat = None
+    return index["category_list"][best], specific_stat, score
+
+
+if __name__ == "__main__":
+    index = build_index()
+    save_index(index)
+    print(f"Intent index written to {INDEX_PATH} ({index['matrix'].shape[0]} documents, "
+          f"{index['matrix'].shape[1]} features)")
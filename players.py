@@ -0,0 +1,211 @@
+import re
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Tuple
+
+from db import DB_PATH, LEGACY_PLAYERS, connect, data_version, normalize_alias, numeric_value, stat_key_for
+
+# After a failed reload, keep the previous index this long before trying again
+RELOAD_RETRY_SECONDS = 5
+
+_WORDS = re.compile(r'[a-z0-9]+')
+
+
+class Player(NamedTuple):
+    id: int
+    key: str
+    name: str
+
+
+class StatDefinition(NamedTuple):
+    key: str
+    description: str
+
+
+class PlayerIndex(NamedTuple):
+    """Players, their aliases, the stats of each category and every player's values, loaded once per data version"""
+    version: str
+    by_id: dict
+    by_key: dict
+    aliases: dict
+    max_alias_words: int
+    alias_starts: frozenset
+    category_stats: dict
+    category_display: dict
+    values: dict  # (player_id, stat_key) -> stored value
+    ranked: dict  # stat_key -> ((player_id, value), ...) by numeric value, highest first
+
+
+def _legacy_index():
+    """Messi and Ronaldo only, for databases that predate the players table"""
+    players = [Player(-(i + 1), key, name) for i, (key, name, _) in enumerate(LEGACY_PLAYERS)]
+    aliases = {}
+    for player, (_, _, player_aliases) in zip(players, LEGACY_PLAYERS):
+        for alias in [player.key, player.name, *player_aliases]:
+            aliases[normalize_alias(alias)] = player.id
+    return aliases, players
+
+
+def _missing_table(error):
+    """True for errors from an older schema; a locked or unreadable database is re-raised by callers"""
+    return "no such table" in str(error)
+
+
+def load_player_index(db_path=DB_PATH):
+    version = data_version(db_path)
+    conn = connect(db_path, readonly=True)
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT id, key, name FROM players")
+            players = [Player(*row) for row in cursor.fetchall()]
+            cursor.execute("SELECT alias, player_id FROM player_aliases")
+            aliases = dict(cursor.fetchall())
+        except sqlite3.OperationalError as e:
+            if not _missing_table(e):
+                raise
+            aliases, players = _legacy_index()
+
+        try:
+            cursor.execute("SELECT player_id, stat_key, value, numeric_value FROM player_stats")
+            rows = cursor.fetchall()
+        except sqlite3.OperationalError as e:
+            if not _missing_table(e):
+                raise
+            rows = None
+
+        # Every schema has the categories table; a database without it (e.g. an empty file) is
+        # not a legacy one, so the error reaches get_player_index and the previous index is kept
+        category_stats = {}
+        category_display = {}
+        # Databases from before the stat_key migration get their keys derived from the descriptions
+        cursor.execute("PRAGMA table_info(stats)")
+        has_stat_key = any(row[1] == "stat_key" for row in cursor.fetchall())
+        cursor.execute(f"""
+            SELECT c.name, c.display_name, {"s.stat_key" if has_stat_key else "NULL"}, s.description FROM categories c
+            LEFT JOIN stats s ON s.category_id = c.id
+            ORDER BY c.id, s.id
+        """)
+        for name, display_name, stat_key, description in cursor.fetchall():
+            category_display[name] = display_name
+            stats = category_stats.setdefault(name, [])
+            stat_key = stat_key or (description and stat_key_for(description))
+            if stat_key and all(stat.key != stat_key for stat in stats):
+                stats.append(StatDefinition(stat_key, description))
+
+        if rows is None:
+            # Legacy databases keep the values in messi_value/ronaldo_value, read like player_stats rows
+            cursor.execute(f"SELECT {'stat_key' if has_stat_key else 'NULL'}, description, messi_value, ronaldo_value FROM stats")
+            rows = []
+            for stat_key, description, *legacy_values in cursor.fetchall():
+                stat_key = stat_key or stat_key_for(description)
+                for i, value in enumerate(legacy_values):
+                    rows.append((-(i + 1), stat_key, value, numeric_value(value)))
+    finally:
+        conn.close()
+
+    values = {}
+    ranked = {}
+    for player_id, stat_key, value, number in rows:
+        values[(player_id, stat_key)] = value
+        if number is not None:
+            ranked.setdefault(stat_key, []).append((-number, player_id, value))
+
+    return PlayerIndex(
+        version=version,
+        by_id={player.id: player for player in players},
+        by_key={player.key: player for player in players},
+        aliases=aliases,
+        max_alias_words=max((len(alias.split()) for alias in aliases), default=1),
+        alias_starts=frozenset(alias.partition(" ")[0] for alias in aliases),
+        category_stats={name: tuple(stats) for name, stats in category_stats.items()},
+        category_display=category_display,
+        values=values,
+        ranked={stat_key: tuple((player_id, value) for _, player_id, value in sorted(entries))
+                for stat_key, entries in ranked.items()},
+    )
+
+
+_index = None
+_index_lock = threading.Lock()
+_retry_at = 0.0
+
+
+def get_player_index(db_path=DB_PATH):
+    """Return the player index, reloading only when the database file has changed.
+
+    While the database is missing or locked the previous index keeps being used, or the
+    legacy players when nothing has loaded yet; either way the next attempt waits
+    RELOAD_RETRY_SECONDS.
+    """
+    global _index, _retry_at
+    version = data_version(db_path)
+    index = _index
+    if index is not None and (index.version == version or version is None or time.monotonic() < _retry_at):
+        return index
+
+    with _index_lock:
+        if _index is None or _index.version != version:
+            try:
+                _index = load_player_index(db_path)
+            except sqlite3.Error as e:
+                print(f"Could not reload players, keeping the previous index: {str(e)}")
+                _retry_at = time.monotonic() + RELOAD_RETRY_SECONDS
+                if _index is None:
+                    # Kept like a loaded index (with no version), so the retry delay applies to it too
+                    aliases, players = _legacy_index()
+                    _index = PlayerIndex(None, {p.id: p for p in players}, {p.key: p for p in players},
+                                         aliases, max(len(a.split()) for a in aliases),
+                                         frozenset(a.partition(" ")[0] for a in aliases), {}, {}, {}, {})
+        return _index
+
+
+def find_players(text, index=None):
+    """Players mentioned in `text`, in order, matching the longest alias at each word"""
+    index = index or get_player_index()
+    words = _WORDS.findall(text.lower())
+    found = []
+    i = 0
+    while i < len(words):
+        # Most words start no alias, so they are skipped without building any candidates
+        if words[i] not in index.alias_starts:
+            i += 1
+            continue
+        for length in range(min(index.max_alias_words, len(words) - i), 0, -1):
+            player_id = index.aliases.get(" ".join(words[i:i + length]))
+            if player_id is not None:
+                player = index.by_id[player_id]
+                if player not in found:
+                    found.append(player)
+                i += length
+                break
+        else:
+            i += 1
+    return found
+
+
+def category_stats(category, specific_stat=None, index=None) -> Tuple[StatDefinition, ...]:
+    """Stats of a category, narrowed to the ones matching `specific_stat` when any do"""
+    index = index or get_player_index()
+    stats = index.category_stats.get(category, ())
+    if specific_stat:
+        wanted = specific_stat.replace('_', ' ').lower()
+        matching = tuple(stat for stat in stats if wanted in (stat.description or '').lower())
+        if matching:
+            return matching
+    return stats
+
+
+def player_values(player_ids, stat_keys, db_path=DB_PATH, index=None):
+    """{(player_id, stat_key): value} for the requested players and stats, from the in-memory index"""
+    index = index or get_player_index(db_path)
+    return {(player_id, stat_key): index.values[(player_id, stat_key)]
+            for player_id in player_ids for stat_key in stat_keys if (player_id, stat_key) in index.values}
+
+
+def top_players(stat_key, k, db_path=DB_PATH, index=None):
+    """The k players with the highest numeric value for a stat, from the index's precomputed ranking"""
+    index = index or get_player_index(db_path)
+    return [(index.by_id[player_id], value) for player_id, value in index.ranked.get(stat_key, ())
+            if player_id in index.by_id][:k]
@@ -0,0 +1,232 @@
+import hmac
+import itertools
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+# cprofile, or pyinstrument when it is installed
+PROFILER = os.environ.get('PROFILER', 'cprofile')
+# Only the most recent profiles are kept, in memory
+BUFFER_SIZE = int(os.environ.get('PROFILE_BUFFER_SIZE', '20'))
+# Requests sending this in X-Profile-Token are always profiled; it also guards the /profiles endpoints
+TOKEN = os.environ.get('PROFILING_TOKEN', '')
+
+# Fraction of requests to the profiled endpoints that get sampled; 0 turns sampling off
+sample_rate = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+
+# Frames below this share of the profile are left out of folded output
+MIN_FOLDED_SHARE = 1 / 20000
+
+
+class ProfileRecord(NamedTuple):
+    id: int
+    endpoint: str
+    path: str
+    reason: str
+    profiler: str
+    started_at: float
+    duration_ms: float
+    data: object  # pstats dict for cProfile, a pyinstrument Session otherwise
+
+    def summary(self):
+        return {"id": self.id, "endpoint": self.endpoint, "path": self.path, "reason": self.reason,
+                "profiler": self.profiler, "started_at": self.started_at, "duration_ms": self.duration_ms}
+
+
+profiles = deque(maxlen=BUFFER_SIZE)
+_ids = itertools.count(1)
+_local = threading.local()
+
+
+def set_sample_rate(rate):
+    global sample_rate
+    sample_rate = min(1.0, max(0.0, float(rate)))
+
+
+def authorized(token):
+    return bool(TOKEN and token) and hmac.compare_digest(token, TOKEN)
+
+
+def should_profile(token=None):
+    """Why this request should be profiled ("header" or "sampled"), or None; cheap when sampling is off"""
+    if token and authorized(token):
+        return "header"
+    if sample_rate and random.random() < sample_rate:
+        return "sampled"
+    return None
+
+
+class _RawStats:
+    """Lets pstats load a stats dict, e.g. one sent back by a worker process"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class _Session:
+    """A profile running on the current thread"""
+
+    def __init__(self, endpoint, path, reason):
+        self.endpoint = endpoint
+        self.path = path
+        self.reason = reason
+        self.worker_stats = []
+        self.kind = "cprofile"
+        if PROFILER == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+                self.profiler = Profiler()
+                self.kind = "pyinstrument"
+            except ImportError:
+                print("pyinstrument is not installed, profiling with cProfile")
+        if self.kind == "cprofile":
+            import cProfile
+            self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        if self.kind == "cprofile":
+            self.profiler.enable()
+        else:
+            self.profiler.start()
+
+    def stop(self):
+        if self.kind == "cprofile":
+            self.profiler.disable()
+            import pstats
+            stats = pstats.Stats(self.profiler)
+            for worker_stats in self.worker_stats:
+                stats.add(_RawStats(worker_stats))
+            data = stats.stats
+        else:
+            data = self.profiler.stop()
+        return ProfileRecord(next(_ids), self.endpoint, self.path, self.reason, self.kind, self.started_at,
+                             round((time.perf_counter() - self._start) * 1000, 2), data)
+
+
+def start(endpoint, path, reason):
+    """Start profiling the current thread; returns None if a profiler is already running"""
+    if getattr(_local, "session", None) is not None:
+        return None
+    session = _Session(endpoint, path, reason)
+    try:
+        session.start()
+    except (ValueError, RuntimeError) as e:
+        # Python 3.12+ allows one cProfile at a time per process
+        print(f"Skipping profile of {path}: {str(e)}")
+        return None
+    _local.session = session
+    return session
+
+
+def finish(session):
+    """Stop a session from start() and keep its profile; returns the ProfileRecord"""
+    if session is None:
+        return None
+    _local.session = None
+    record = session.stop()
+    profiles.append(record)
+    return record
+
+
+def wants_worker_profiles():
+    """True when work handed to other processes should be profiled and sent back"""
+    session = getattr(_local, "session", None)
+    return session is not None and session.kind == "cprofile"
+
+
+def add_worker_stats(stats):
+    session = getattr(_local, "session", None)
+    if session is not None and session.kind == "cprofile":
+        session.worker_stats.append(stats)
+
+
+def profile_call(fn, *args, **kwargs):
+    """Run fn under cProfile; returns (result, stats dict) for sending back from a worker process"""
+    import cProfile
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn, *args, **kwargs)
+    profiler.create_stats()
+    return result, profiler.stats
+
+
+def get_profile(profile_id):
+    for record in list(profiles):
+        if record.id == profile_id:
+            return record
+    return None
+
+
+def _frame_name(func):
+    filename, line, name = func
+    if filename == "~":
+        return name.replace(";", ":")
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ":")
+
+
+def folded_stacks(stats):
+    """Collapse a pstats dict into "frame;frame;frame microseconds" lines.
+
+    cProfile keeps caller/callee edges rather than whole stacks, so each function's time is
+    split across its callers in proportion to the time spent through each edge.
+    """
+    children = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            if caller in stats:
+                children.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, row in stats.items() if not any(caller in stats for caller in row[4])]
+
+    total = sum(stats[func][3] for func in roots)
+    min_time = total * MIN_FOLDED_SHARE
+    lines = {}
+
+    def walk(func, stack, elapsed):
+        _, _, own, cumulative, _ = stats[func]
+        if cumulative <= 0 or elapsed < min_time:
+            return
+        scale = min(1.0, elapsed / cumulative)
+        micros = int(own * scale * 1e6)
+        if micros:
+            lines[stack] = lines.get(stack, 0) + micros
+        for child, edge_time in children.get(func, ()):
+            name = _frame_name(child)
+            if name not in stack.split(";"):
+                walk(child, f"{stack};{name}", edge_time * scale)
+
+    for root in roots:
+        walk(root, _frame_name(root), stats[root][3])
+    return "".join(f"{stack} {micros}\n" for stack, micros in lines.items())
+
+
+def render(record, fmt=None):
+    """(body, mimetype, file extension) for a stored profile; raises ValueError for unknown formats"""
+    if record.profiler == "pyinstrument":
+        from pyinstrument.renderers import ConsoleRenderer, SpeedscopeRenderer
+        fmt = fmt or "speedscope"
+        if fmt == "speedscope":
+            return SpeedscopeRenderer().render(record.data), "application/json", "speedscope.json"
+        if fmt == "text":
+            return ConsoleRenderer().render(record.data), "text/plain", "txt"
+        raise ValueError(f"Unknown format {fmt!r}; use speedscope or text")
+
+    fmt = fmt or "folded"
+    if fmt == "folded":
+        return folded_stacks(record.data), "text/plain", "folded"
+    if fmt == "pstats":
+        import marshal
+        return marshal.dumps(record.data), "application/octet-stream", "prof"
+    if fmt == "text":
+        import io
+        import pstats
+        stream = io.StringIO()
+        pstats.Stats(_RawStats(dict(record.data)), stream=stream).sort_stats("cumulative").print_stats(50)
+        return stream.getvalue(), "text/plain", "txt"
+    raise ValueError(f"Unknown format {fmt!r}; use folded, pstats or text")
@@ -0,0 +1,172 @@
+import atexit
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows, where the log is written by a single process
+    fcntl = None
+
+# Records waiting for the writer; beyond this they are dropped rather than slowing requests down
+MAX_PENDING = 10000
+
+# Only these fields of the client's context hint are logged, and only as short strings
+CONTEXT_FIELDS = ("category", "comparison_type")
+MAX_CONTEXT_VALUE = 64
+
+_STOP = object()
+
+
+def normalize_question(question):
+    """Lowercase words separated by single spaces, so repeats of a question compare equal"""
+    return " ".join(re.findall(r'[a-z0-9]+', question.lower()))
+
+
+def session_key(session_id):
+    """Short stable hash of a session id, enough to replay a conversation without storing the id"""
+    if not isinstance(session_id, str) or not session_id:
+        return None
+    return hashlib.sha1(session_id.encode("utf-8")).hexdigest()[:12]
+
+
+def loggable_context(hint):
+    """The whitelisted fields of a client-supplied context hint, or None when there are none"""
+    if not isinstance(hint, dict):
+        return None
+    context = {field: hint[field] for field in CONTEXT_FIELDS
+               if isinstance(hint.get(field), str) and len(hint[field]) <= MAX_CONTEXT_VALUE}
+    return context or None
+
+
+class QuestionLog:
+    """Append-only JSON-lines log written by a background thread, rotated by size"""
+
+    def __init__(self, path, max_bytes=5 * 1024 * 1024, backups=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+        self._queue = queue.Queue(MAX_PENDING)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._file = None
+
+    def record(self, **fields):
+        """Queue one record; never blocks, and drops the record if the writer has fallen behind"""
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(fields)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="question-log", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Everything that queued up while the last batch was being written goes out together
+            while batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            self._write([record for record in batch if record is not _STOP])
+            if stop:
+                if self._file:
+                    self._file.close()
+                return
+
+    def _write(self, records):
+        if not records:
+            return
+        data = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode("utf-8")
+        try:
+            self._open()
+            size = os.fstat(self._file.fileno()).st_size
+            if size and size + len(data) > self.max_bytes:
+                self._rotate(len(data))
+            # One unbuffered append per batch, so lines from several processes never interleave
+            self._file.write(data)
+        except OSError as e:
+            print(f"Could not write the question log: {str(e)}")
+
+    def _open(self):
+        """Open the log, or reopen it when another process has rotated it away"""
+        if self._file is not None:
+            try:
+                if os.stat(self.path).st_ino == os.fstat(self._file.fileno()).st_ino:
+                    return
+            except FileNotFoundError:
+                pass
+            self._file.close()
+            self._file = None
+        self._file = open(self.path, "ab", buffering=0)
+
+    def _rotate(self, incoming):
+        """questions.log -> questions.log.1 -> ... -> questions.log.<backups>, dropping the oldest.
+
+        Every worker process appends to the same file, so they take turns under a lock file
+        and only the first one to find the log full rotates it.
+        """
+        with open(f"{self.path}.lock", "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._open()
+            size = os.fstat(self._file.fileno()).st_size
+            if not size or size + incoming <= self.max_bytes:
+                return
+            self._file.close()
+            self._file = None
+            for i in range(self.backups - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            if self.backups:
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+            self._file = open(self.path, "ab", buffering=0)
+
+    def close(self, timeout=2):
+        """Write out whatever is queued and stop the writer"""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+def log_files(path):
+    """The log and its rotated backups, oldest first"""
+    files = []
+    i = 1
+    while os.path.exists(f"{path}.{i}"):
+        files.insert(0, f"{path}.{i}")
+        i += 1
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def create_question_log():
+    """Question log configured from QUESTION_LOG (path; empty turns it off) and the rotation settings"""
+    path = os.environ.get('QUESTION_LOG', 'questions.log')
+    if not path:
+        return None
+    return QuestionLog(
+        path,
+        max_bytes=int(os.environ.get('QUESTION_LOG_MAX_BYTES', str(5 * 1024 * 1024))),
+        backups=int(os.environ.get('QUESTION_LOG_BACKUPS', '5')),
+    )
@@ -0,0 +1,229 @@
+"""Replay the question log against the app and report on the traffic.
+
+Reads questions.log and its rotated backups, reports how much a question or intent
+cache could absorb, which intents are hot and how latency is distributed, then
+replays the questions at a multiple of their original pace (in-process, or against
+a running server with --url) to see how the app holds up.
+
+    python replay_questions.py --speed 10 --workers 16
+    python replay_questions.py --url http://localhost:5000 --speed 2
+    python replay_questions.py --analyze-only
+"""
+import argparse
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from question_log import log_files
+
+
+def read_log(path):
+    """Every record in the log and its backups, ordered by time"""
+    records = []
+    for name in log_files(path):
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # a torn line from a crash mid-write
+    records.sort(key=lambda record: record.get("ts", 0))
+    return records
+
+
+def intent_key(record):
+    return (record.get("category"), record.get("specific_stat"), record.get("comparison_type"),
+            tuple(record.get("players") or ()), record.get("top_k"))
+
+
+def percentiles(values, points=(50, 90, 99)):
+    """{"p50": .., "p90": .., "p99": .., "max": ..} by nearest rank; empty when there are no values"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {f"p{p}": ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points}
+    result["max"] = ordered[-1]
+    return result
+
+
+def hit_rate(keys):
+    """Share of requests a cache keyed on `keys` could have answered: every repeat after the first"""
+    keys = list(keys)
+    return 1 - len(set(keys)) / len(keys) if keys else 0.0
+
+
+def analyze(records, top=10):
+    """Cache hit potential, hot intents and recorded latency for a list of log records"""
+    if not records:
+        return {"requests": 0}
+    duration = max(records[-1]["ts"] - records[0]["ts"], 1e-9)
+    per_second = Counter(int(record["ts"]) for record in records)
+    cacheable = [record for record in records if record.get("cacheable")]
+
+    intents = Counter(intent_key(record) for record in records)
+    latency_by_type = {}
+    for record in records:
+        latency_by_type.setdefault(record.get("type"), []).append(record.get("latency_ms", 0))
+
+    return {
+        "requests": len(records),
+        "duration_s": round(duration, 1),
+        "mean_rps": round(len(records) / duration, 2),
+        "peak_rps": max(per_second.values()),
+        "unique_questions": len({record["question"] for record in records}),
+        "unique_intents": len(intents),
+        "cache_hit_potential": {
+            # Exact repeats of a normalized question, which the browser cache and a response cache absorb
+            "question": round(hit_rate(record["question"] for record in records), 3),
+            # Repeats of a resolved intent, for a cache keyed after intent extraction
+            "intent": round(hit_rate(intent_key(record) for record in records), 3),
+            # Only answers that don't depend on the conversation are safe to cache
+            "question_cacheable_only": round(hit_rate(record["question"] for record in cacheable), 3),
+            "cacheable_share": round(len(cacheable) / len(records), 3),
+        },
+        "hot_intents": [
+            {"category": key[0], "specific_stat": key[1], "comparison_type": key[2],
+             "players": list(key[3]), "top_k": key[4], "requests": count,
+             "share": round(count / len(records), 3)}
+            for key, count in intents.most_common(top)
+        ],
+        "answer_types": dict(Counter(record.get("type") for record in records).most_common()),
+        "latency_ms": percentiles([record.get("latency_ms", 0) for record in records]),
+        "latency_ms_by_type": {answer_type: percentiles(values) for answer_type, values in latency_by_type.items()},
+    }
+
+
+def _in_process_sender():
+    # Replayed questions must not be logged again, so the log is off before the app is imported
+    os.environ["QUESTION_LOG"] = ""
+    import app
+
+    def send(payload, client):
+        client_app = app.app.test_client()
+        response = client_app.post("/ask", json=payload, environ_base={"REMOTE_ADDR": client})
+        return response.status_code
+    return send
+
+
+def _http_sender(url):
+    def send(payload, client):
+        request = urllib.request.Request(f"{url.rstrip('/')}/ask", data=json.dumps(payload).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except OSError:
+            return 0
+    return send
+
+
+def replay(records, speed=1.0, workers=8, max_gap=5.0, url=None):
+    """Send the logged questions at `speed` times their original pace; returns the replay report"""
+    send = _http_sender(url) if url else _in_process_sender()
+    clients = {}
+
+    def payload_for(record):
+        payload = {"question": record["question"]}
+        if record.get("session"):
+            payload["session_id"] = f"replay-{record['session']}"
+        if record.get("context"):
+            payload["context"] = record["context"]
+        return payload
+
+    def client_for(index, record):
+        # Each logged conversation replays from its own address so per-client limits apply as they did live
+        key = record.get("session") or index
+        return clients.setdefault(key, f"10.{len(clients) // 65536 % 256}.{len(clients) // 256 % 256}.{len(clients) % 256}")
+
+    def timed_send(payload, client):
+        start = time.perf_counter()
+        status = send(payload, client)
+        return status, (time.perf_counter() - start) * 1000
+
+    # Offsets from the first question, compressed by `speed`, with long idle gaps capped
+    offsets = []
+    offset = 0.0
+    for previous, record in zip([None] + records, records):
+        if previous is not None:
+            offset += min((record["ts"] - previous["ts"]) / speed, max_gap)
+        offsets.append(offset)
+
+    futures = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for index, (record, offset) in enumerate(zip(records, offsets)):
+            delay = offset - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(timed_send, payload_for(record), client_for(index, record)))
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    statuses = Counter(status for status, _ in results)
+    return {
+        "requests": len(results),
+        "speed": speed,
+        "elapsed_s": round(elapsed, 2),
+        "offered_rps": round(len(results) / max(offsets[-1], 1e-9), 2) if offsets else 0,
+        "achieved_rps": round(len(results) / elapsed, 2) if elapsed else 0,
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "latency_ms": percentiles([round(latency, 3) for status, latency in results if status == 200]),
+    }
+
+
+def _print_report(title, report):
+    print(f"\n== {title} ==")
+    for key, value in report.items():
+        if key != "hot_intents":
+            print(f"{key}: {json.dumps(value)}")
+            continue
+        print("hot_intents:")
+        for intent in value:
+            parts = [intent["category"], intent["specific_stat"], intent["comparison_type"],
+                     ",".join(intent["players"]), intent["top_k"] and f"top {intent['top_k']}"]
+            print(f"  {intent['share']:6.1%} {intent['requests']:7d}  {' / '.join(str(part) for part in parts if part)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log", default=os.environ.get("QUESTION_LOG") or "questions.log",
+                        help="question log to read, rotated backups included")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="multiple of the logged traffic rate to replay at")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent requests during replay")
+    parser.add_argument("--max-gap", type=float, default=5.0,
+                        help="longest pause between replayed questions, in seconds")
+    parser.add_argument("--limit", type=int, help="replay only the first N questions")
+    parser.add_argument("--top", type=int, default=10, help="number of hot intents to list")
+    parser.add_argument("--url", help="replay against a running server instead of in-process")
+    parser.add_argument("--analyze-only", action="store_true", help="report on the log without replaying")
+    parser.add_argument("--json", action="store_true", help="print the reports as one JSON document")
+    args = parser.parse_args()
+
+    records = read_log(args.log)
+    if not records:
+        parser.error(f"No questions found in {args.log}")
+    if args.limit:
+        records = records[:args.limit]
+
+    reports = {"logged": analyze(records, args.top)}
+    if not args.analyze_only:
+        reports["replay"] = replay(records, args.speed, args.workers, args.max_gap, args.url)
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        _print_report(f"Logged traffic ({len(records)} questions)", reports["logged"])
+        if "replay" in reports:
+            _print_report(f"Replay at {args.speed}x", reports["replay"])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,92 @@
-import requests
-from bs4 import BeautifulSoup
 import sqlite3
 import re
-import json
+import os
 import datetime
-import time
-import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# URLs to scrape; SCRAPER_SOURCES (comma separated URLs or local file paths) overrides them
+SOURCES = [
+    "https://messivsronaldo.app",
+    "https://messivsronaldo.net",
+    "https://www.messivsronaldo.io"
+]
+
+CATEGORIES = [
+    {"id": 1, "name": "goals", "display_name": "Goals"},
+    {"id": 2, "name": "assists", "display_name": "Assists"},
+    {"id": 3, "name": "trophies", "display_name": "Trophies"},
+    {"id": 4, "name": "awards", "display_name": "Awards"},
+    {"id": 5, "name": "international", "display_name": "International Performance"},
+    {"id": 6, "name": "club", "display_name": "Club Performance"},
+    {"id": 7, "name": "career", "display_name": "Career Statistics"},
+    {"id": 8, "name": "hat_tricks", "display_name": "Hat Tricks"},
+    {"id": 9, "name": "free_kicks", "display_name": "Free Kicks"},
+    {"id": 10, "name": "penalties", "display_name": "Penalties"}
+]
+
+# Known-good values, used when no source can be reached and as a low-weight vote otherwise
+FALLBACK_STATS = [
+    # Goals
+    {"category_id": 1, "description": "Total Career Goals", "messi_value": "821", "ronaldo_value": "837"},
+    {"category_id": 1, "description": "Club Goals", "messi_value": "701", "ronaldo_value": "713"},
+    {"category_id": 1, "description": "International Goals", "messi_value": "120", "ronaldo_value": "124"},
+    {"category_id": 1, "description": "Champions League Goals", "messi_value": "129", "ronaldo_value": "140"},
+    
+    # Assists
+    {"category_id": 2, "description": "Total Career Assists", "messi_value": "338", "ronaldo_value": "258"},
+    {"category_id": 2, "description": "Club Assists", "messi_value": "305", "ronaldo_value": "226"},
+    {"category_id": 2, "description": "International Assists", "messi_value": "33", "ronaldo_value": "32"},
+    
+    # Trophies
+    {"category_id": 3, "description": "Total Major Trophies", "messi_value": "42", "ronaldo_value": "34"},
+    {"category_id": 3, "description": "Champions League Titles", "messi_value": "4", "ronaldo_value": "5"},
+    {"category_id": 3, "description": "League Titles", "messi_value": "12", "ronaldo_value": "7"},
+    {"category_id": 3, "description": "World Cup Titles", "messi_value": "1", "ronaldo_value": "0"},
+    
+    # Awards
+    {"category_id": 4, "description": "Ballon d'Or", "messi_value": "8", "ronaldo_value": "5"},
+    {"category_id": 4, "description": "FIFA Best Player", "messi_value": "6", "ronaldo_value": "5"},
+    {"category_id": 4, "description": "Golden Boot", "messi_value": "6", "ronaldo_value": "4"},
+    
+    # International
+    {"category_id": 5, "description": "World Cup Goals", "messi_value": "13", "ronaldo_value": "8"},
+    {"category_id": 5, "description": "World Cup Appearances", "messi_value": "5", "ronaldo_value": "5"},
+    {"category_id": 5, "description": "Major International Trophies", "messi_value": "2", "ronaldo_value": "1"},
+    
+    # Club Performance
+    {"category_id": 6, "description": "Champions League Goals", "messi_value": "129", "ronaldo_value": "140"},
+    {"category_id": 6, "description": "Champions League Assists", "messi_value": "40", "ronaldo_value": "42"},
+    {"category_id": 6, "description": "League Goals", "messi_value": "496", "ronaldo_value": "498"},
+    
+    # Career Stats
+    {"category_id": 7, "description": "Games Played", "messi_value": "1050", "ronaldo_value": "1178"},
+    {"category_id": 7, "description": "Goals per Game", "messi_value": "0.78", "ronaldo_value": "0.71"},
+    {"category_id": 7, "description": "Career Hat-tricks", "messi_value": "56", "ronaldo_value": "61"},
+    
+    # Hat Tricks
+    {"category_id": 8, "description": "Career Hat Tricks", "messi_value": "56", "ronaldo_value": "61"},
+    {"category_id": 8, "description": "International Hat Tricks", "messi_value": "9", "ronaldo_value": "10"},
+    {"category_id": 8, "description": "Club Hat Tricks", "messi_value": "47", "ronaldo_value": "51"},
+    
+    # Free Kicks
+    {"category_id": 9, "description": "Free Kick Goals", "messi_value": "65", "ronaldo_value": "58"},
+    {"category_id": 9, "description": "Club Free Kicks", "messi_value": "58", "ronaldo_value": "53"},
+    {"category_id": 9, "description": "International Free Kicks", "messi_value": "7", "ronaldo_value": "5"},
+    
+    # Penalties
+    {"category_id": 10, "description": "Penalty Goals", "messi_value": "110", "ronaldo_value": "142"},
+    {"category_id": 10, "description": "Penalty Conversion Rate", "messi_value": "78%", "ronaldo_value": "84%"}
+]
+
+# Sources scoring below this are ignored entirely
+MIN_SOURCE_SCORE = 0.2
+
+# Weight of the fallback values when voting against scraped values
+FALLBACK_WEIGHT = 0.3
+
+# Largest value we believe for a counting stat; percentages must stay within 0-100
+MAX_PLAUSIBLE_VALUE = 2000
 
 def clean_value(value):
     """Clean up a value from the website"""
@@ -30,383 +111,267 @@ def extract_number(text):
         return match.group(1)
     return text
 
-def scrape_messi_vs_ronaldo():
-    """Scrape data about Messi and Ronaldo and store in SQLite database"""
-    print("Starting data scraping for Messi vs Ronaldo statistics...")
+def stat_key(description):
+    """Key used to line up the same stat across sources"""
+    return re.sub(r'[^a-z0-9]+', '_', (description or '').lower()).strip('_')
+
+def category_for_heading(text):
+    """Map a section heading to one of our category ids, or None if it doesn't match any"""
+    text = text.lower()
+    if any(word in text for word in ['goal', 'score']):
+        return 1  # Goals
+    elif any(word in text for word in ['assist']):
+        return 2  # Assists
+    elif any(word in text for word in ['trophy', 'trophies', 'title']):
+        return 3  # Trophies
+    elif any(word in text for word in ['award', 'ballon']):
+        return 4  # Awards
+    elif any(word in text for word in ['international', 'world cup']):
+        return 5  # International
+    elif any(word in text for word in ['club', 'barcelona', 'madrid']):
+        return 6  # Club
+    elif any(word in text for word in ['career', 'overall']):
+        return 7  # Career
+    elif any(word in text for word in ['hat trick', 'hat-trick']):
+        return 8  # Hat Tricks
+    elif any(word in text for word in ['free kick', 'freekick']):
+        return 9  # Free Kicks
+    elif any(word in text for word in ['penalty', 'penalties']):
+        return 10  # Penalties
+    return None
+
+def fetch_page(source):
+    """Return the HTML of a source URL or of a local fixture file"""
+    if not re.match(r'https?://', source):
+        with open(source, encoding='utf-8') as f:
+            return f.read()
     
-    # Create/connect to SQLite database
-    conn = sqlite3.connect('football_stats.db')
-    cursor = conn.cursor()
+    import requests
+    response = requests.get(source, timeout=10, headers={
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    })
+    response.raise_for_status()
+    return response.text
+
+def parse_stats(html):
+    """Extract stat records from a page using the section/heading heuristics"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    records = []
     
-    # Create tables if they don't exist
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS categories (
-        id INTEGER PRIMARY KEY,
-        name TEXT UNIQUE,
-        display_name TEXT
-    )
-    ''')
-    
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS stats (
-        id INTEGER PRIMARY KEY,
-        category_id INTEGER,
-        messi_value TEXT,
-        ronaldo_value TEXT,
-        description TEXT,
-        last_updated TEXT,
-        FOREIGN KEY (category_id) REFERENCES categories (id)
-    )
-    ''')
-    
-    # Clear existing data for a fresh scrape
-    cursor.execute("DELETE FROM stats")
-    cursor.execute("DELETE FROM categories")
-    conn.commit()
+    # First approach: Look for specific stat comparison sections
+    sections = soup.find_all(['section', 'div'], class_=lambda c: c and ('stat' in c.lower() or 'comparison' in c.lower()))
     
-    # Pre-defined categories and stats to add to the database (fallback data)
-    categories = [
-        {"id": 1, "name": "goals", "display_name": "Goals"},
-        {"id": 2, "name": "assists", "display_name": "Assists"},
-        {"id": 3, "name": "trophies", "display_name": "Trophies"},
-        {"id": 4, "name": "awards", "display_name": "Awards"},
-        {"id": 5, "name": "international", "display_name": "International Performance"},
-        {"id": 6, "name": "club", "display_name": "Club Performance"},
-        {"id": 7, "name": "career", "display_name": "Career Statistics"},
-        {"id": 8, "name": "hat_tricks", "display_name": "Hat Tricks"},
-        {"id": 9, "name": "free_kicks", "display_name": "Free Kicks"},
-        {"id": 10, "name": "penalties", "display_name": "Penalties"}
-    ]
-    
-    # Insert categories
-    for category in categories:
-        cursor.execute("INSERT INTO categories (id, name, display_name) VALUES (?, ?, ?)",
-                      (category["id"], category["name"], category["display_name"]))
-    
-    # URLs to scrape
-    urls = [
-        "https://messivsronaldo.app",
-        "https://messivsronaldo.net",
-        "https://www.messivsronaldo.io"
-    ]
-    
-    success = False
-    
-    for url in urls:
-        try:
-            print(f"Trying to scrape from {url}...")
-            response = requests.get(url, timeout=10, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            })
-            response.raise_for_status()
-            success = True
-            print(f"Successfully connected to {url}")
-            break
-        except Exception as e:
-            print(f"Failed to connect to {url}: {e}")
-            continue
+    if not sections:
+        # Second approach: Try to find divs with headings that might contain stats
+        sections = []
+        for heading in soup.find_all(['h1', 'h2', 'h3'], string=lambda s: s and ('goals' in s.lower() or 'assists' in s.lower() or 'trophies' in s.lower())):
+            parent = heading.find_parent('div')
+            if parent:
+                sections.append(parent)
     
-    # If we couldn't connect to any of the websites, use hardcoded data
-    if not success:
-        print("Couldn't connect to any source website. Using hardcoded data instead.")
+    for section in sections:
+        heading = section.find(['h1', 'h2', 'h3', 'h4'])
+        if not heading:
+            continue
         
-        # Add hardcoded statistics
-        stats = [
-            # Goals
-            {"category_id": 1, "description": "Total Career Goals", "messi_value": "821", "ronaldo_value": "837"},
-            {"category_id": 1, "description": "Club Goals", "messi_value": "701", "ronaldo_value": "713"},
-            {"category_id": 1, "description": "International Goals", "messi_value": "120", "ronaldo_value": "124"},
-            {"category_id": 1, "description": "Champions League Goals", "messi_value": "129", "ronaldo_value": "140"},
-            
-            # Assists
-            {"category_id": 2, "description": "Total Career Assists", "messi_value": "338", "ronaldo_value": "258"},
-            {"category_id": 2, "description": "Club Assists", "messi_value": "305", "ronaldo_value": "226"},
-            {"category_id": 2, "description": "International Assists", "messi_value": "33", "ronaldo_value": "32"},
-            
-            # Trophies
-            {"category_id": 3, "description": "Total Major Trophies", "messi_value": "42", "ronaldo_value": "34"},
-            {"category_id": 3, "description": "Champions League Titles", "messi_value": "4", "ronaldo_value": "5"},
-            {"category_id": 3, "description": "League Titles", "messi_value": "12", "ronaldo_value": "7"},
-            {"category_id": 3, "description": "World Cup Titles", "messi_value": "1", "ronaldo_value": "0"},
-            
-            # Awards
-            {"category_id": 4, "description": "Ballon d'Or", "messi_value": "8", "ronaldo_value": "5"},
-            {"category_id": 4, "description": "FIFA Best Player", "messi_value": "6", "ronaldo_value": "5"},
-            {"category_id": 4, "description": "Golden Boot", "messi_value": "6", "ronaldo_value": "4"},
+        # Unrecognised headings still yield records, flagged so they can't introduce new stats
+        category_id = category_for_heading(heading.text.strip())
+        category_guessed = category_id is None
+        if category_guessed:
+            category_id = 7
+        
+        # Try different approaches to find stat items
+        stat_items = section.find_all(['div', 'li'], class_=lambda c: c and ('stat' in c.lower() or 'item' in c.lower()))
+        
+        if not stat_items:
+            stat_items = section.find_all(['tr', 'div', 'li'])
+        
+        for item in stat_items:
+            description = None
+            messi_value = None
+            ronaldo_value = None
+            positional = False
             
-            # International
-            {"category_id": 5, "description": "World Cup Goals", "messi_value": "13", "ronaldo_value": "8"},
-            {"category_id": 5, "description": "World Cup Appearances", "messi_value": "5", "ronaldo_value": "5"},
-            {"category_id": 5, "description": "Major International Trophies", "messi_value": "2", "ronaldo_value": "1"},
+            desc_elem = item.find(['h3', 'h4', 'p', 'th', 'span'])
+            if desc_elem:
+                description = clean_value(desc_elem.text)
             
-            # Club Performance
-            {"category_id": 6, "description": "Champions League Goals", "messi_value": "129", "ronaldo_value": "140"},
-            {"category_id": 6, "description": "Champions League Assists", "messi_value": "40", "ronaldo_value": "42"},
-            {"category_id": 6, "description": "League Goals", "messi_value": "496", "ronaldo_value": "498"},
+            # First try class-based approach
+            messi_elem = item.find(['div', 'span', 'td'], class_=lambda c: c and ('messi' in c.lower()))
+            ronaldo_elem = item.find(['div', 'span', 'td'], class_=lambda c: c and ('ronaldo' in c.lower() or 'cr7' in c.lower()))
             
-            # Career Stats
-            {"category_id": 7, "description": "Games Played", "messi_value": "1050", "ronaldo_value": "1178"},
-            {"category_id": 7, "description": "Goals per Game", "messi_value": "0.78", "ronaldo_value": "0.71"},
-            {"category_id": 7, "description": "Career Hat-tricks", "messi_value": "56", "ronaldo_value": "61"},
+            if messi_elem:
+                messi_value = clean_value(messi_elem.text)
             
-            # Hat Tricks
-            {"category_id": 8, "description": "Career Hat Tricks", "messi_value": "56", "ronaldo_value": "61"},
-            {"category_id": 8, "description": "International Hat Tricks", "messi_value": "9", "ronaldo_value": "10"},
-            {"category_id": 8, "description": "Club Hat Tricks", "messi_value": "47", "ronaldo_value": "51"},
+            if ronaldo_elem:
+                ronaldo_value = clean_value(ronaldo_elem.text)
             
-            # Free Kicks
-            {"category_id": 9, "description": "Free Kick Goals", "messi_value": "65", "ronaldo_value": "58"},
-            {"category_id": 9, "description": "Club Free Kicks", "messi_value": "58", "ronaldo_value": "53"},
-            {"category_id": 9, "description": "International Free Kicks", "messi_value": "7", "ronaldo_value": "5"},
+            # If that didn't work, fall back to the first two numbers in the item
+            if not messi_value or not ronaldo_value:
+                numbers = []
+                for num_elem in item.find_all(['span', 'div', 'td', 'p']):
+                    if re.search(r'\d+', num_elem.text):
+                        numbers.append(clean_value(num_elem.text))
+                
+                if len(numbers) >= 2:
+                    messi_value = numbers[0]
+                    ronaldo_value = numbers[1]
+                    positional = True
             
-            # Penalties
-            {"category_id": 10, "description": "Penalty Goals", "messi_value": "110", "ronaldo_value": "142"},
-            {"category_id": 10, "description": "Penalty Conversion Rate", "messi_value": "78%", "ronaldo_value": "84%"}
-        ]
-        
-        # Insert stats
-        last_updated = datetime.datetime.now().strftime("%Y-%m-%d")
-        for stat in stats:
-            cursor.execute("""
-                INSERT INTO stats 
-                (category_id, messi_value, ronaldo_value, description, last_updated)
-                VALUES (?, ?, ?, ?, ?)
-            """, (stat["category_id"], stat["messi_value"], stat["ronaldo_value"], 
-                  stat["description"], last_updated))
-        
-        conn.commit()
-        conn.close()
-        return True
+            if description and (messi_value or ronaldo_value):
+                records.append({
+                    "category_id": category_id,
+                    "description": description,
+                    "messi_value": messi_value or "N/A",
+                    "ronaldo_value": ronaldo_value or "N/A",
+                    "category_guessed": category_guessed,
+                    "positional": positional,
+                })
     
-    # If we reached here, we successfully connected to a website
-    # Parse the HTML
-    soup = BeautifulSoup(response.text, 'html.parser')
+    return records
+
+def plausible_value(value):
+    """Whether a scraped value looks like a real stat: a number in a sensible range"""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)\s*(%?)', (value or '').replace(',', ''))
+    if not match:
+        return False
+    number = float(match.group(1))
+    return number <= 100 if match.group(2) else number <= MAX_PLAUSIBLE_VALUE
+
+def score_records(records):
+    """Quality score in [0, 1]: coverage of the known stats and plausibility of the values"""
+    if not records:
+        return 0.0
     
-    # Try different scraping approaches based on website structure
-    try:
-        # First approach: Look for specific stat comparison sections
-        sections = soup.find_all(['section', 'div'], class_=lambda c: c and ('stat' in c.lower() or 'comparison' in c.lower()))
-        
-        if not sections:
-            # Second approach: Try to find divs with headings that might contain stats
-            sections = []
-            for heading in soup.find_all(['h1', 'h2', 'h3'], string=lambda s: s and ('goals' in s.lower() or 'assists' in s.lower() or 'trophies' in s.lower())):
-                parent = heading.find_parent('div')
-                if parent:
-                    sections.append(parent)
-        
-        print(f"Found {len(sections)} potential stats sections")
-        
-        if sections:
-            # Process found sections
-            for section in sections:
-                # Try to identify category
-                category_text = None
-                heading = section.find(['h1', 'h2', 'h3', 'h4'])
-                
-                if heading:
-                    category_text = heading.text.strip()
-                
-                # Map to our predefined categories
-                category_id = None
-                if category_text:
-                    category_text_lower = category_text.lower()
-                    if any(word in category_text_lower for word in ['goal', 'score']):
-                        category_id = 1  # Goals
-                    elif any(word in category_text_lower for word in ['assist']):
-                        category_id = 2  # Assists
-                    elif any(word in category_text_lower for word in ['trophy', 'trophies', 'title']):
-                        category_id = 3  # Trophies
-                    elif any(word in category_text_lower for word in ['award', 'ballon']):
-                        category_id = 4  # Awards
-                    elif any(word in category_text_lower for word in ['international', 'world cup']):
-                        category_id = 5  # International
-                    elif any(word in category_text_lower for word in ['club', 'barcelona', 'madrid']):
-                        category_id = 6  # Club
-                    elif any(word in category_text_lower for word in ['career', 'overall']):
-                        category_id = 7  # Career
-                    elif any(word in category_text_lower for word in ['hat trick', 'hat-trick']):
-                        category_id = 8  # Hat Tricks
-                    elif any(word in category_text_lower for word in ['free kick', 'freekick']):
-                        category_id = 9  # Free Kicks
-                    elif any(word in category_text_lower for word in ['penalty', 'penalties']):
-                        category_id = 10  # Penalties
-                    else:
-                        # Default to Career stats if can't determine
-                        category_id = 7
-                
-                # Look for stat items
-                # Try different approaches to find stat items
-                stat_items = section.find_all(['div', 'li'], class_=lambda c: c and ('stat' in c.lower() or 'item' in c.lower()))
-                
-                if not stat_items:
-                    # Try another approach
-                    stat_items = section.find_all(['tr', 'div', 'li'])
-                
-                for item in stat_items:
-                    # Try to extract description and values
-                    description = None
-                    messi_value = None
-                    ronaldo_value = None
-                    
-                    # Try to find heading/description
-                    desc_elem = item.find(['h3', 'h4', 'p', 'th', 'span'])
-                    if desc_elem:
-                        description = clean_value(desc_elem.text)
-                    
-                    # Try to find Messi and Ronaldo values
-                    # First try class-based approach
-                    messi_elem = item.find(['div', 'span', 'td'], class_=lambda c: c and ('messi' in c.lower()))
-                    ronaldo_elem = item.find(['div', 'span', 'td'], class_=lambda c: c and ('ronaldo' in c.lower() or 'cr7' in c.lower()))
-                    
-                    if messi_elem:
-                        messi_value = clean_value(messi_elem.text)
-                    
-                    if ronaldo_elem:
-                        ronaldo_value = clean_value(ronaldo_elem.text)
-                    
-                    # If that didn't work, try looking for all numbers
-                    if not messi_value or not ronaldo_value:
-                        numbers = []
-                        for num_elem in item.find_all(['span', 'div', 'td', 'p']):
-                            if re.search(r'\d+', num_elem.text):
-                                numbers.append(clean_value(num_elem.text))
-                        
-                        if len(numbers) >= 2:
-                            messi_value = numbers[0]
-                            ronaldo_value = numbers[1]
-                    
-                    # If we found a valid stat, save it
-                    if description and (messi_value or ronaldo_value) and category_id:
-                        if not messi_value:
-                            messi_value = "N/A"
-                        if not ronaldo_value:
-                            ronaldo_value = "N/A"
-                        
-                        last_updated = datetime.datetime.now().strftime("%Y-%m-%d")
-                        cursor.execute("""
-                            INSERT INTO stats 
-                            (category_id, messi_value, ronaldo_value, description, last_updated)
-                            VALUES (?, ?, ?, ?, ?)
-                        """, (category_id, messi_value, ronaldo_value, description, last_updated))
-        
-        # If we didn't find any stats through HTML scraping, use hardcoded data
-        cursor.execute("SELECT COUNT(*) FROM stats")
-        if cursor.fetchone()[0] == 0:
-            print("Failed to extract meaningful data from the website. Using hardcoded data.")
-            # Insert hardcoded stats (same as the ones above)
-            stats = [
-                # Goals
-                {"category_id": 1, "description": "Total Career Goals", "messi_value": "821", "ronaldo_value": "837"},
-                {"category_id": 1, "description": "Club Goals", "messi_value": "701", "ronaldo_value": "713"},
-                {"category_id": 1, "description": "International Goals", "messi_value": "120", "ronaldo_value": "124"},
-                {"category_id": 1, "description": "Champions League Goals", "messi_value": "129", "ronaldo_value": "140"},
-                
-                # Assists
-                {"category_id": 2, "description": "Total Career Assists", "messi_value": "338", "ronaldo_value": "258"},
-                {"category_id": 2, "description": "Club Assists", "messi_value": "305", "ronaldo_value": "226"},
-                {"category_id": 2, "description": "International Assists", "messi_value": "33", "ronaldo_value": "32"},
-                
-                # Trophies
-                {"category_id": 3, "description": "Total Major Trophies", "messi_value": "42", "ronaldo_value": "34"},
-                {"category_id": 3, "description": "Champions League Titles", "messi_value": "4", "ronaldo_value": "5"},
-                {"category_id": 3, "description": "League Titles", "messi_value": "12", "ronaldo_value": "7"},
-                {"category_id": 3, "description": "World Cup Titles", "messi_value": "1", "ronaldo_value": "0"},
-                
-                # Awards
-                {"category_id": 4, "description": "Ballon d'Or", "messi_value": "8", "ronaldo_value": "5"},
-                {"category_id": 4, "description": "FIFA Best Player", "messi_value": "6", "ronaldo_value": "5"},
-                {"category_id": 4, "description": "Golden Boot", "messi_value": "6", "ronaldo_value": "4"},
-                
-                # International
-                {"category_id": 5, "description": "World Cup Goals", "messi_value": "13", "ronaldo_value": "8"},
-                {"category_id": 5, "description": "World Cup Appearances", "messi_value": "5", "ronaldo_value": "5"},
-                {"category_id": 5, "description": "Major International Trophies", "messi_value": "2", "ronaldo_value": "1"},
-                
-                # Club Performance
-                {"category_id": 6, "description": "Champions League Goals", "messi_value": "129", "ronaldo_value": "140"},
-                {"category_id": 6, "description": "Champions League Assists", "messi_value": "40", "ronaldo_value": "42"},
-                {"category_id": 6, "description": "League Goals", "messi_value": "496", "ronaldo_value": "498"},
-                
-                # Career Stats
-                {"category_id": 7, "description": "Games Played", "messi_value": "1050", "ronaldo_value": "1178"},
-                {"category_id": 7, "description": "Goals per Game", "messi_value": "0.78", "ronaldo_value": "0.71"},
-                {"category_id": 7, "description": "Career Hat-tricks", "messi_value": "56", "ronaldo_value": "61"},
-                
-                # Hat Tricks
-                {"category_id": 8, "description": "Career Hat Tricks", "messi_value": "56", "ronaldo_value": "61"},
-                {"category_id": 8, "description": "International Hat Tricks", "messi_value": "9", "ronaldo_value": "10"},
-                {"category_id": 8, "description": "Club Hat Tricks", "messi_value": "47", "ronaldo_value": "51"},
-                
-                # Free Kicks
-                {"category_id": 9, "description": "Free Kick Goals", "messi_value": "65", "ronaldo_value": "58"},
-                {"category_id": 9, "description": "Club Free Kicks", "messi_value": "58", "ronaldo_value": "53"},
-                {"category_id": 9, "description": "International Free Kicks", "messi_value": "7", "ronaldo_value": "5"},
-                
-                # Penalties
-                {"category_id": 10, "description": "Penalty Goals", "messi_value": "110", "ronaldo_value": "142"},
-                {"category_id": 10, "description": "Penalty Conversion Rate", "messi_value": "78%", "ronaldo_value": "84%"}
-            ]
-            
-            # Insert stats
-            last_updated = datetime.datetime.now().strftime("%Y-%m-%d")
-            for stat in stats:
-                cursor.execute("""
-                    INSERT INTO stats 
-                    (category_id, messi_value, ronaldo_value, description, last_updated)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (stat["category_id"], stat["messi_value"], stat["ronaldo_value"], 
-                      stat["description"], last_updated))
+    known = {stat_key(stat["description"]) for stat in FALLBACK_STATS}
+    found = {stat_key(record["description"]) for record in records}
+    coverage = len(known & found) / len(known)
+    
+    plausibility = 0.0
+    for record in records:
+        if plausible_value(record["messi_value"]) and plausible_value(record["ronaldo_value"]):
+            # Values picked by position rather than by a messi/ronaldo class are less trustworthy
+            plausibility += 0.5 if record["positional"] else 1.0
+    plausibility /= len(records)
     
+    return round(0.5 * coverage + 0.5 * plausibility, 3)
+
+def scrape_source(source, profile=False):
+    """Fetch, parse and score one source; runs in a worker process"""
+    if profile:
+        # The parent request is being profiled; send this worker's profile back with the result
+        from profiling import profile_call
+        result, stats = profile_call(scrape_source, source)
+        return dict(result, profile=stats)
+    try:
+        records = parse_stats(fetch_page(source))
     except Exception as e:
-        print(f"Error during scraping: {e}")
-        # If anything goes wrong, use hardcoded data
-        # Clear any partial data
-        cursor.execute("DELETE FROM stats")
-        
-        # Insert hardcoded stats (same as the ones above)
-        stats = [
-            # Goals
-            {"category_id": 1, "description": "Total Career Goals", "messi_value": "821", "ronaldo_value": "837"},
-            {"category_id": 1, "description": "Club Goals", "messi_value": "701", "ronaldo_value": "713"},
-            {"category_id": 1, "description": "International Goals", "messi_value": "120", "ronaldo_value": "124"},
-            {"category_id": 1, "description": "Champions League Goals", "messi_value": "129", "ronaldo_value": "140"},
-            
-            # Assists
-            {"category_id": 2, "description": "Total Career Assists", "messi_value": "338", "ronaldo_value": "258"},
-            {"category_id": 2, "description": "Club Assists", "messi_value": "305", "ronaldo_value": "226"},
-            {"category_id": 2, "description": "International Assists", "messi_value": "33", "ronaldo_value": "32"},
-            
-            # Trophies
-            {"category_id": 3, "description": "Total Major Trophies", "messi_value": "42", "ronaldo_value": "34"},
-            {"category_id": 3, "description": "Champions League Titles", "messi_value": "4", "ronaldo_value": "5"},
-            {"category_id": 3, "description": "League Titles", "messi_value": "12", "ronaldo_value": "7"},
-            {"category_id": 3, "description": "World Cup Titles", "messi_value": "1", "ronaldo_value": "0"},
-            
-            # Awards
-            {"category_id": 4, "description": "Ballon d'Or", "messi_value": "8", "ronaldo_value": "5"},
-            {"category_id": 4, "description": "FIFA Best Player", "messi_value": "6", "ronaldo_value": "5"},
-            {"category_id": 4, "description": "Golden Boot", "messi_value": "6", "ronaldo_value": "4"},
-            
-            # Rest of the stats...
-            {"category_id": 5, "description": "World Cup Goals", "messi_value": "13", "ronaldo_value": "8"},
-            {"category_id": 5, "description": "World Cup Appearances", "messi_value": "5", "ronaldo_value": "5"},
-            {"category_id": 8, "description": "Career Hat Tricks", "messi_value": "56", "ronaldo_value": "61"},
-            {"category_id": 9, "description": "Free Kick Goals", "messi_value": "65", "ronaldo_value": "58"},
-            {"category_id": 10, "description": "Penalty Goals", "messi_value": "110", "ronaldo_value": "142"}
-        ]
-        
-        # Insert stats
-        last_updated = datetime.datetime.now().strftime("%Y-%m-%d")
-        for stat in stats:
-            cursor.execute("""
-                INSERT INTO stats 
-                (category_id, messi_value, ronaldo_value, description, last_updated)
-                VALUES (?, ?, ?, ?, ?)
-            """, (stat["category_id"], stat["messi_value"], stat["ronaldo_value"], 
-                  stat["description"], last_updated))
+        return {"source": source, "records": [], "score": 0.0, "error": str(e)}
+    return {"source": source, "records": records, "score": score_records(records), "error": None}
+
+def scrape_sources(sources):
+    """Scrape every source in parallel worker processes"""
+    workers = max(1, min(len(sources), os.cpu_count() or 1))
+    # spawn rather than fork, since the web app calls this from a background thread
+    import profiling
+    profile = profiling.wants_worker_profiles()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        results = list(pool.map(scrape_source, sources, [profile] * len(sources)))
+    for result in results:
+        stats = result.pop("profile", None)
+        if stats:
+            profiling.add_worker_stats(stats)
+    return results
+
+def reconcile(results):
+    """Pick one value pair per stat by a score-weighted vote across sources and the fallback data"""
+    votes = {}
+    # stat key -> {category id: description}; the same stat can be listed under several categories
+    descriptions = {}
+    
+    def vote(key, record, weight):
+        pair = (record["messi_value"], record["ronaldo_value"])
+        votes.setdefault(key, {})
+        votes[key][pair] = votes[key].get(pair, 0) + weight
+    
+    # Fallback first, so known stats keep their curated description in each of their categories.
+    # A stat listed under two categories is still one fallback vote
+    for stat in FALLBACK_STATS:
+        key = stat_key(stat["description"])
+        if key not in votes:
+            vote(key, stat, FALLBACK_WEIGHT)
+        descriptions.setdefault(key, {}).setdefault(stat["category_id"], stat["description"])
+    
+    for result in results:
+        if result["score"] < MIN_SOURCE_SCORE:
+            continue
+        for record in result["records"]:
+            if not (plausible_value(record["messi_value"]) and plausible_value(record["ronaldo_value"])):
+                continue
+            key = stat_key(record["description"])
+            if key not in descriptions:
+                # New stats need a recognised category to be accepted
+                if record["category_guessed"]:
+                    continue
+                descriptions[key] = {record["category_id"]: record["description"]}
+            vote(key, record, result["score"])
+    
+    stats = []
+    for key, candidates in votes.items():
+        (messi_value, ronaldo_value), weight = max(candidates.items(), key=lambda item: item[1])
+        for category_id, description in descriptions[key].items():
+            stats.append({
+                "category_id": category_id,
+                "description": description,
+                "messi_value": messi_value,
+                "ronaldo_value": ronaldo_value,
+                "confidence": round(weight / sum(candidates.values()), 3),
+            })
+    return stats
+
+def scrape_messi_vs_ronaldo():
+    """Scrape data about Messi and Ronaldo and store in SQLite database"""
+    from db import DB_PATH, ensure_schema, sync_player_stats
+    
+    print("Starting data scraping for Messi vs Ronaldo statistics...")
+    
+    sources = [s.strip() for s in os.environ.get("SCRAPER_SOURCES", "").split(",") if s.strip()] or SOURCES
+    results = scrape_sources(sources)
+    
+    for result in results:
+        if result["error"]:
+            print(f"Failed to scrape {result['source']}: {result['error']}")
+        else:
+            print(f"Scraped {len(result['records'])} records from {result['source']} (quality score {result['score']})")
+    
+    if not any(result["score"] >= MIN_SOURCE_SCORE for result in results):
+        print("No source produced usable data. Using hardcoded data instead.")
+    
+    stats = reconcile(results)
+    
+    # Create/connect to SQLite database
+    conn = sqlite3.connect(DB_PATH)
+    ensure_schema(conn)
+    cursor = conn.cursor()
+    
+    # Replace everything in one transaction, so readers see either the old or the new data
+    cursor.execute("DELETE FROM stats")
+    cursor.execute("DELETE FROM categories")
+    
+    cursor.executemany("INSERT INTO categories (id, name, display_name) VALUES (?, ?, ?)",
+                       [(c["id"], c["name"], c["display_name"]) for c in CATEGORIES])
+    
+    last_updated = datetime.datetime.now().strftime("%Y-%m-%d")
+    cursor.executemany("""
+        INSERT INTO stats
+        (category_id, messi_value, ronaldo_value, description, last_updated)
+        VALUES (?, ?, ?, ?, ?)
+    """, [(stat["category_id"], stat["messi_value"], stat["ronaldo_value"], stat["description"], last_updated)
+          for stat in stats])
     
     # Commit changes and close connection
+    sync_player_stats(conn)
     conn.commit()
     conn.close()
     
@@ -414,4 +379,4 @@ def scrape_messi_vs_ronaldo():
     return True
 
 if __name__ == "__main__":
-    scrape_messi_vs_ronaldo()
\ No newline at end of file
+    scrape_messi_vs_ronaldo()
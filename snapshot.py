@@ -0,0 +1,171 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Tuple
+
+from db import DB_PATH, DB_TIMEOUT, connect, data_version
+
+# After a failed reload, keep serving the previous snapshot this long before trying again
+RELOAD_RETRY_SECONDS = 5
+
+
+class StatRecord(NamedTuple):
+    """One stat row, keeping only the fields answers use"""
+    description: str
+    messi_value: str
+    ronaldo_value: str
+
+
+class CategoryRecord(NamedTuple):
+    """A category with its stats and the answer text/JSON that never change between requests"""
+    id: int
+    name: str
+    display_name: str
+    stats: Tuple[StatRecord, ...]
+    messi_text: str
+    ronaldo_text: str
+    comparison_text: str
+    data_json: "JSONFragment"
+
+
+class Snapshot(NamedTuple):
+    version: str
+    categories: Tuple[CategoryRecord, ...]
+    by_name: dict
+    bundle_json: str
+    updated_at: float
+    loaded_at: float
+
+
+class DataUnavailable(Exception):
+    """No snapshot has ever loaded and the database can't be read right now"""
+
+
+class JSONFragment(str):
+    """Already-serialized JSON that response builders splice in verbatim"""
+
+
+def _player_text(player_name, display_name, stats, key):
+    result = f"{player_name}'s {display_name} Statistics:\n\n"
+    for stat in stats:
+        if stat.description:
+            result += f"• {stat.description}: {getattr(stat, key)}\n"
+    return result.strip()
+
+
+def _comparison_text(display_name, stats):
+    result = f"Comparing {display_name} between Messi and Ronaldo:\n\n"
+    for stat in stats:
+        if stat.description:
+            result += f"• {stat.description}: Messi ({stat.messi_value}) vs Ronaldo ({stat.ronaldo_value})\n"
+    return result.strip()
+
+
+def build_category(category_id, name, display_name, stats):
+    stats = tuple(stats)
+    return CategoryRecord(
+        id=category_id,
+        name=name,
+        display_name=display_name,
+        stats=stats,
+        messi_text=_player_text("Lionel Messi", display_name, stats, "messi_value"),
+        ronaldo_text=_player_text("Cristiano Ronaldo", display_name, stats, "ronaldo_value"),
+        comparison_text=_comparison_text(display_name, stats),
+        data_json=JSONFragment(json.dumps([stat._asdict() for stat in stats])),
+    )
+
+
+def build_bundle(version, records):
+    """Compact JSON of every category for client-side caching; stats are [description, messi, ronaldo]"""
+    return json.dumps({
+        "version": version,
+        "categories": [{
+            "name": record.name,
+            "display_name": record.display_name,
+            "messi_text": record.messi_text,
+            "ronaldo_text": record.ronaldo_text,
+            "comparison_text": record.comparison_text,
+            "stats": [list(stat) for stat in record.stats],
+        } for record in records],
+    }, separators=(",", ":"))
+
+
+def load_snapshot(db_path=DB_PATH):
+    """Read every category and stat once and build the immutable records"""
+    version = data_version(db_path)
+    updated_at = os.path.getmtime(db_path) if version else time.time()
+    conn = connect(db_path, readonly=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name, display_name FROM categories ORDER BY id")
+        categories = cursor.fetchall()
+        cursor.execute("SELECT category_id, description, messi_value, ronaldo_value FROM stats ORDER BY id")
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    stats_by_category = {}
+    for category_id, description, messi_value, ronaldo_value in rows:
+        stats_by_category.setdefault(category_id, []).append(
+            StatRecord(description, messi_value, ronaldo_value))
+
+    records = tuple(
+        build_category(category_id, name, display_name, stats_by_category.get(category_id, ()))
+        for category_id, name, display_name in categories
+    )
+    return Snapshot(version, records, {record.name: record for record in records},
+                    build_bundle(version, records), updated_at, time.time())
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+_retry_at = 0.0
+last_error = None
+
+
+def get_snapshot(db_path=DB_PATH):
+    """Return the current snapshot, reloading only when the database file has changed.
+
+    If the file is missing, another request is already reloading, or the reload fails
+    (e.g. the database stays locked past DB_TIMEOUT), the last good snapshot is returned
+    instead, so a refresh or disk hiccup never makes a request wait or fail.
+    """
+    global _snapshot, _retry_at, last_error
+    version = data_version(db_path)
+    snapshot = _snapshot
+    if snapshot is not None:
+        if snapshot.version == version or version is None or time.monotonic() < _retry_at:
+            return snapshot
+        if not _snapshot_lock.acquire(blocking=False):
+            return snapshot
+    elif not _snapshot_lock.acquire(timeout=DB_TIMEOUT):
+        raise DataUnavailable("Timed out waiting for the statistics to load")
+
+    try:
+        if _snapshot is None or _snapshot.version != version:
+            try:
+                _snapshot = load_snapshot(db_path)
+                last_error = None
+            except sqlite3.Error as e:
+                last_error = str(e)
+                _retry_at = time.monotonic() + RELOAD_RETRY_SECONDS
+                if _snapshot is None:
+                    raise DataUnavailable(f"Statistics are unavailable: {last_error}") from e
+                print(f"Reload failed, serving the snapshot from {_snapshot.version}: {last_error}")
+        return _snapshot
+    finally:
+        _snapshot_lock.release()
+
+
+def dumps_with_fragments(payload):
+    """json.dumps for a flat dict whose JSONFragment values are emitted without re-encoding"""
+    plain = {key: value for key, value in payload.items() if not isinstance(value, JSONFragment)}
+    parts = [json.dumps(plain)[:-1]]
+    for key, value in payload.items():
+        if isinstance(value, JSONFragment):
+            separator = ", " if len(parts) > 1 or plain else ""
+            parts.append(f"{separator}{json.dumps(key)}: {value}")
+    parts.append("}")
+    return "".join(parts)
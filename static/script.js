@@ -7,6 +7,133 @@ document.addEventListener('DOMContentLoaded', function() {
     const refreshBtn = document.getElementById('refresh-btn');
     const refreshDataBtn = document.getElementById('refresh-data-btn');
     
+    // Conversation id so the server can resolve follow-up questions
+    function newSessionId() {
+        const id = Date.now().toString(36) + Math.random().toString(36).slice(2);
+        sessionStorage.setItem('sessionId', id);
+        return id;
+    }
+    let sessionId = sessionStorage.getItem('sessionId') || newSessionId();
+
+    // Client-side copy of every category (the server's /bundle) and of earlier answers, keyed by data version
+    const BUNDLE_KEY = 'statbot-bundle';
+    const ANSWERS_KEY = 'statbot-answers';
+    const MAX_CACHED_ANSWERS = 200;
+    const PLAYER_NAMES = { messi: 'messi', lionel: 'messi', leo: 'messi', ronaldo: 'ronaldo', cristiano: 'ronaldo', cr7: 'ronaldo' };
+    const COMPARISON_WORDS = new Set(['compare', 'comparison', 'vs', 'versus']);
+    const FILLER_WORDS = new Set(['and', 's', 'stats', 'statistics', 'show', 'me', 'what', 'about', 'the', 'of', 'his', 'their', 'record']);
+    const FOCUSED_INTENTS = ['messi_only', 'ronaldo_only', 'players'];
+
+    let bundle = readStorage(BUNDLE_KEY);
+    let answerCache = readStorage(ANSWERS_KEY) || { version: null, answers: {} };
+    // Intent of the last answer, and of the last answer given locally that the server hasn't heard about
+    let lastIntent = null;
+    let pendingContext = null;
+
+    function readStorage(key) {
+        try {
+            return JSON.parse(localStorage.getItem(key));
+        } catch (e) {
+            return null;
+        }
+    }
+
+    function writeStorage(key, value) {
+        try {
+            localStorage.setItem(key, JSON.stringify(value));
+        } catch (e) {
+            // Storage full or disabled; the in-memory copy still serves this page
+        }
+    }
+
+    function setDataVersion(version) {
+        if (answerCache.version !== version) {
+            answerCache = { version, answers: {} };
+            writeStorage(ANSWERS_KEY, answerCache);
+        }
+    }
+
+    function loadBundle() {
+        const headers = bundle ? { 'If-None-Match': `"${bundle.version}"` } : {};
+        return fetch('/bundle', { headers })
+            .then(response => {
+                if (response.status === 304) return bundle;
+                if (!response.ok) throw new Error(`Bundle request failed with status ${response.status}`);
+                return response.json();
+            })
+            .then(data => {
+                bundle = data;
+                writeStorage(BUNDLE_KEY, bundle);
+                setDataVersion(bundle.version);
+            })
+            .catch(error => console.error('Error loading data bundle:', error));
+    }
+
+    function normalizeQuestion(question) {
+        return question.toLowerCase().replace(/[^a-z0-9 ]+/g, ' ').replace(/\s+/g, ' ').trim();
+    }
+
+    function answerFromCache(normalized) {
+        const entry = answerCache.answers[normalized];
+        if (!entry) return null;
+
+        // Without a player of its own, the question would follow the current focus on the server
+        if (entry.intent.comparison_type === 'general' && lastIntent && FOCUSED_INTENTS.includes(lastIntent.comparison_type)) {
+            return null;
+        }
+        return entry;
+    }
+
+    function answerFromBundle(normalized) {
+        // Only answer from a bundle that matches the data the server is currently serving
+        if (!bundle || bundle.version !== answerCache.version) return null;
+
+        const players = new Set();
+        const topic = [];
+        let comparison = false;
+        normalized.split(' ').forEach(word => {
+            if (PLAYER_NAMES[word]) players.add(PLAYER_NAMES[word]);
+            else if (COMPARISON_WORDS.has(word)) comparison = true;
+            else if (!FILLER_WORDS.has(word)) topic.push(word);
+        });
+
+        // Common intents only: the rest of the question must be exactly a category name
+        const topicText = topic.join(' ');
+        const category = bundle.categories.find(c =>
+            c.name.replace(/_/g, ' ') === topicText || c.display_name.toLowerCase() === topicText);
+        if (!category || !category.stats.length) return null;
+
+        let comparisonType = comparison ? 'comparison' : 'general';
+        if (players.size === 1) {
+            comparisonType = players.has('messi') ? 'messi_only' : 'ronaldo_only';
+        } else if (players.size === 0 && !comparison && lastIntent) {
+            if (lastIntent.comparison_type === 'players') return null;
+            if (FOCUSED_INTENTS.includes(lastIntent.comparison_type)) comparisonType = lastIntent.comparison_type;
+        }
+
+        const answer = comparisonType === 'messi_only' ? category.messi_text
+            : comparisonType === 'ronaldo_only' ? category.ronaldo_text
+            : category.comparison_text;
+        return { answer, intent: { category: category.name, comparison_type: comparisonType } };
+    }
+
+    function rememberAnswer(normalized, data) {
+        if (data.data_version && data.data_version !== answerCache.version) {
+            setDataVersion(data.data_version);
+            loadBundle();
+        }
+        if (!data.cacheable) return;
+
+        const answers = answerCache.answers;
+        delete answers[normalized];
+        answers[normalized] = { answer: data.answer, intent: data.intent };
+
+        // Keep the cache bounded by dropping the oldest entry
+        const keys = Object.keys(answers);
+        if (keys.length > MAX_CACHED_ANSWERS) delete answers[keys[0]];
+        writeStorage(ANSWERS_KEY, answerCache);
+    }
+
     // Theme Toggle
     themeToggle.addEventListener('click', function() {
         const currentTheme = document.documentElement.getAttribute('data-theme');
@@ -140,7 +267,18 @@ document.addEventListener('DOMContentLoaded', function() {
         // Add user message
         addUserMessage(question);
         questionInput.value = '';
-        
+
+        // Repeat and common questions are answered from the local cache without a request
+        const normalized = normalizeQuestion(question);
+        const local = answerFromCache(normalized) || answerFromBundle(normalized);
+        if (local) {
+            lastIntent = local.intent;
+            // Sent with the next server request so follow-up questions still resolve
+            pendingContext = local.intent;
+            addBotMessage(local.answer);
+            return;
+        }
+
         // Disable input while processing
         questionInput.disabled = true;
         sendButton.disabled = true;
@@ -154,15 +292,21 @@ document.addEventListener('DOMContentLoaded', function() {
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({ question })
+            body: JSON.stringify({ question, session_id: sessionId, context: pendingContext })
         })
         .then(response => response.json())
         .then(data => {
             // Hide thinking animation
             hideThinking();
-            
+
+            pendingContext = null;
+            if (data.intent && data.intent.category && !['clarification', 'not_found'].includes(data.type)) {
+                lastIntent = data.intent;
+            }
+            rememberAnswer(normalized, data);
+
             // Add bot response with line-by-line typing
-            addBotMessage(data.answer);
+            addBotMessage(data.answer || data.message || 'Sorry, I could not answer that right now.');
             
             // Re-enable input
             questionInput.disabled = false;
@@ -182,6 +326,11 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Refresh conversation
     refreshBtn.addEventListener('click', function() {
+        // Start a fresh conversation context on the server
+        sessionId = newSessionId();
+        lastIntent = null;
+        pendingContext = null;
+        
         // Remove all messages except the welcome message
         while (messagesContainer.children.length > 1) {
             messagesContainer.removeChild(messagesContainer.lastChild);
@@ -193,6 +342,9 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Refresh data
     refreshDataBtn.addEventListener('click', function() {
+        // Ignore repeat clicks until the current refresh finishes
+        refreshDataBtn.disabled = true;
+        
         // Show a refreshing message
         addBotMessage('Refreshing player statistics and data...');
         
@@ -200,13 +352,25 @@ document.addEventListener('DOMContentLoaded', function() {
         fetch('/refresh-data', {
             method: 'POST'
         })
-        .then(response => response.json())
-        .then(data => {
-            addBotMessage('Statistics database updated successfully with the latest player data!');
+        .then(response => response.json().then(data => ({ status: response.status, data })))
+        .then(({ status, data }) => {
+            if (data.status === 'success') {
+                addBotMessage('Statistics database updated successfully with the latest player data!');
+                loadBundle();
+            } else if (status === 202) {
+                addBotMessage('Refresh requested. The latest player data will be available shortly.');
+            } else if (status === 409 || status === 429) {
+                addBotMessage('A refresh was requested recently. Please wait a moment before trying again.');
+            } else {
+                addBotMessage('Unable to refresh data. Please try again later.');
+            }
         })
         .catch(error => {
             addBotMessage('Unable to refresh data. Please try again later.');
             console.error('Error refreshing data:', error);
+        })
+        .finally(() => {
+            refreshDataBtn.disabled = false;
         });
     });
     
@@ -218,6 +382,9 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
     
+    // Fetch (or revalidate) the data bundle in the background
+    loadBundle();
+    
     // Focus input on load
     questionInput.focus();
 });
\ No newline at end of file
@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from db import data_version  # noqa: E402
+from distribution import SnapshotDistributor  # noqa: E402
+
+
+def write_goals(db_path, value):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE IF NOT EXISTS stats (description TEXT, messi_value TEXT)")
+    conn.execute("DELETE FROM stats")
+    conn.execute("INSERT INTO stats VALUES ('Total Career Goals', ?)", (value,))
+    conn.commit()
+    conn.close()
+
+
+def read_goals(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT messi_value FROM stats").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def fleet(tmp_path):
+    """A leader and a follower sharing one snapshot directory, each with its own database"""
+    directory = str(tmp_path / "snapshots")
+    leader = SnapshotDistributor(directory, role="leader", db_path=str(tmp_path / "leader.db"))
+    follower = SnapshotDistributor(directory, role="follower", db_path=str(tmp_path / "follower.db"))
+    assert leader.try_lead()
+    write_goals(leader.db_path, "821")
+    write_goals(follower.db_path, "seed")
+    yield leader, follower
+    for distributor in (leader, follower):
+        if distributor._lock_file:
+            distributor._lock_file.close()
+
+
+def test_follower_installs_what_the_leader_publishes(fleet):
+    leader, follower = fleet
+    manifest = leader.publish()
+
+    follower._poll()
+
+    assert read_goals(follower.db_path) == "821"
+    assert data_version(follower.db_path) == data_version(leader.db_path) == manifest["version"]
+
+
+def test_only_the_leader_publishes(fleet):
+    _, follower = fleet
+    with pytest.raises(RuntimeError):
+        follower.publish()
+    assert follower.manifest() is None
+
+
+def test_failed_install_is_retried_on_the_next_poll(fleet):
+    leader, follower = fleet
+    manifest = leader.publish()
+    published = os.path.join(leader.directory, manifest["file"])
+
+    os.rename(published, published + ".hidden")
+    with pytest.raises(OSError):
+        follower._poll()
+    os.rename(published + ".hidden", published)
+
+    follower._poll()
+    assert data_version(follower.db_path) == manifest["version"]
+
+
+def test_refresh_requests_reach_the_leader(fleet):
+    leader, follower = fleet
+    requests = []
+    leader.on_refresh_request = lambda: requests.append(True)
+
+    follower.request_refresh()
+    leader._poll()
+    leader._poll()
+
+    assert requests == [True]
+
+
+def test_follower_takes_over_when_the_leader_goes_away(tmp_path):
+    directory = str(tmp_path / "snapshots")
+    first = SnapshotDistributor(directory, db_path=str(tmp_path / "first.db"))
+    second = SnapshotDistributor(directory, db_path=str(tmp_path / "second.db"))
+    write_goals(first.db_path, "821")
+    write_goals(second.db_path, "seed")
+    promoted = []
+    second.on_lead = lambda: promoted.append(True)
+
+    assert first.try_lead()
+    assert not second.try_lead()
+    manifest = first.publish()
+
+    # The lock is released when the leader's process exits
+    first._lock_file.close()
+    second._poll()
+
+    assert second.is_leader and promoted == [True]
+    assert data_version(second.db_path) == manifest["version"]
+    second._lock_file.close()
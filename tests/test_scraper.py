@@ -0,0 +1,76 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import scraper  # noqa: E402
+
+FIXTURE = os.path.join(ROOT, "tests", "fixtures", "stats_page.html")
+
+
+def by_category(stats, description):
+    return {stat["category_id"]: stat for stat in stats if scraper.stat_key(stat["description"]) == scraper.stat_key(description)}
+
+
+def test_fixture_page_scrapes_from_a_file_path():
+    result = scraper.scrape_source(FIXTURE)
+
+    assert result["error"] is None
+    records = {record["description"]: record for record in result["records"]}
+    assert records["Total Career Goals"]["messi_value"] == "850"
+    assert not records["Total Career Goals"]["positional"]
+    assert records["International Hat Tricks"]["positional"]
+    assert records["Shirt Number"]["category_guessed"]
+    assert result["score"] >= scraper.MIN_SOURCE_SCORE
+
+
+def test_score_records_rewards_coverage_and_plausible_values():
+    good = scraper.scrape_source(FIXTURE)["records"]
+    implausible = [dict(record, messi_value="99999") for record in good]
+
+    assert scraper.score_records([]) == 0.0
+    assert 0 < scraper.score_records(implausible) < scraper.score_records(good) <= 1
+    positional = [dict(record, positional=True) for record in good]
+    assert scraper.score_records(positional) < scraper.score_records(good)
+
+
+def test_reconcile_prefers_a_good_source_over_the_fallback():
+    result = scraper.scrape_source(FIXTURE)
+    stats = scraper.reconcile([result])
+
+    goals = by_category(stats, "Total Career Goals")[1]
+    assert (goals["messi_value"], goals["ronaldo_value"]) == ("850", "900")
+    # Stats the page doesn't have keep the fallback values
+    penalties = by_category(stats, "Penalty Goals")[10]
+    assert (penalties["messi_value"], penalties["confidence"]) == ("110", 1.0)
+    # A new stat under a recognised heading is accepted; one under an unknown heading or with an
+    # implausible value is not
+    assert by_category(stats, "Olympic Goals")[1]["messi_value"] == "2"
+    assert not by_category(stats, "Shirt Number")
+    assert not by_category(stats, "Goals Celebrated")
+
+
+def test_reconcile_ignores_low_scoring_sources():
+    result = dict(scraper.scrape_source(FIXTURE), score=scraper.MIN_SOURCE_SCORE / 2)
+    stats = scraper.reconcile([result])
+
+    assert by_category(stats, "Total Career Goals")[1]["messi_value"] == "821"
+    assert not by_category(stats, "Olympic Goals")
+
+
+def test_reconcile_keeps_a_description_per_category_and_one_fallback_vote_per_stat():
+    result = scraper.scrape_source(FIXTURE)
+    stats = scraper.reconcile([result])
+
+    # "Career Hat-tricks" (career) and "Career Hat Tricks" (hat tricks) are the same stat
+    hat_tricks = by_category(stats, "Career Hat Tricks")
+    assert hat_tricks[7]["description"] == "Career Hat-tricks"
+    assert hat_tricks[8]["description"] == "Career Hat Tricks"
+
+    # Listed twice in the fallback data, but the fallback still votes once against the source
+    expected = round(result["score"] / (result["score"] + scraper.FALLBACK_WEIGHT), 3)
+    for category_id in (1, 6):
+        stat = by_category(stats, "Champions League Goals")[category_id]
+        assert stat["ronaldo_value"] == "141"
+        assert stat["confidence"] == expected